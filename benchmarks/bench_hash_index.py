@@ -0,0 +1,83 @@
+# video_scraper_project/benchmarks/bench_hash_index.py
+#
+# Query latency of HashIndex against index size, compared with the linear
+# scan it replaced. Run from the project root:
+#
+#     python -m benchmarks.bench_hash_index [--sizes 1000 10000 100000]
+
+import argparse
+import random
+import time
+from processing.hash_index import HashIndex
+
+
+def random_hashes(count, rng, bits=64):
+    return [rng.getrandbits(bits) for _ in range(count)]
+
+
+def flip_bits(value, count, rng, bits=64):
+    """Return a near-duplicate of a hash with `count` random bits flipped"""
+    for bit in rng.sample(range(bits), count):
+        value ^= 1 << bit
+    return value
+
+
+def linear_scan(hashes, query, threshold):
+    return [i for i, value in enumerate(hashes) if (value ^ query).bit_count() <= threshold]
+
+
+def bench(size, queries, threshold, rng):
+    hashes = random_hashes(size, rng)
+
+    index = HashIndex(threshold=threshold)
+    start = time.perf_counter()
+    index.add_many((f"video-{i}", value) for i, value in enumerate(hashes))
+    build_s = time.perf_counter() - start
+
+    # Half the queries are planted near-duplicates, half are unrelated
+    probes = []
+    for i in range(queries):
+        if i % 2:
+            probes.append(flip_bits(rng.choice(hashes), rng.randint(0, threshold), rng))
+        else:
+            probes.append(rng.getrandbits(64))
+
+    start = time.perf_counter()
+    hits = sum(1 for probe in probes if index.nearest(probe))
+    index_us = (time.perf_counter() - start) / queries * 1e6
+
+    scan_queries = probes[:max(1, min(queries, 2_000_000 // size))]
+    start = time.perf_counter()
+    for probe in scan_queries:
+        linear_scan(hashes, probe, threshold)
+    scan_us = (time.perf_counter() - start) / len(scan_queries) * 1e6
+
+    return {
+        'size': size,
+        'build_s': build_s,
+        'index_us': index_us,
+        'scan_us': scan_us,
+        'hit_rate': hits / queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HashIndex query latency")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 300_000])
+    parser.add_argument('--queries', type=int, default=2_000)
+    parser.add_argument('--threshold', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>10} {'build (s)':>10} {'index (us)':>12} {'scan (us)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        result = bench(size, args.queries, args.threshold, rng)
+        print(
+            f"{result['size']:>10} {result['build_s']:>10.2f} {result['index_us']:>12.1f} "
+            f"{result['scan_us']:>12.1f} {result['scan_us'] / result['index_us']:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
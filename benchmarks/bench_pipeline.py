@@ -0,0 +1,455 @@
+# video_scraper_project/benchmarks/bench_pipeline.py
+#
+# Offline benchmark of every pipeline stage on synthetic videos. YouTube and
+# Drive are replaced by local fakes, so runs need no credentials or network
+# and are reproducible. Results are printed and written as JSON for
+# comparing runs over time. Run from the project root:
+#
+#     python -m benchmarks.bench_pipeline [--videos 6] [--output results.json] [--compare old.json]
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.synthetic import build_specs, generate_corpus
+from benchmarks.fake_drive import FakeDriveServer
+from benchmarks.fake_youtube import FakeYouTubeService, FakeMediaServer
+from config import BRAND_NAME, BRAND_KEYWORDS, DEDUP_THRESHOLD
+from processing.video_converter import VideoConverter
+from processing.video_deduplicator import VideoDeduplicator
+from scraper.youtube_scraper import YouTubeScraper
+from uploader.metadata_logger import MetadataLogger
+from uploader.resumable_upload import ResumableUploader, UploadSessionStore
+from utils.helpers import generate_video_hash
+from utils.rate_limiter import RateLimiter, RequestClient
+from utils.validators import filter_video_metadata
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "brand_video_bench_corpus")
+RESOLUTIONS = [(640, 360), (1280, 720), (1920, 1080)]
+DURATIONS = [5, 15]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident memory so far of this process and of its largest (ffmpeg) child, in MB.
+
+    Both are high-water marks over the whole run, not of one stage: a
+    stage's value is the peak of every stage up to and including it.
+    """
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is in bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return round(own, 1), round(children, 1)
+
+
+class StageTimer:
+    """Per-item latencies and bytes for one stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.bytes = 0
+        self.started_at = None
+        self.total_s = 0.0
+        self.extra = {}
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total_s = time.perf_counter() - self.started_at
+
+    def measure(self, func, *args, size=0, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.latencies.append(time.perf_counter() - start)
+        self.bytes += size
+        return result
+
+    def summary(self):
+        count = len(self.latencies)
+        own_rss, children_rss = peak_rss_mb()
+        result = {
+            'items': count,
+            'total_s': round(self.total_s, 4),
+            'items_per_s': round(count / self.total_s, 2) if self.total_s else None,
+            'mb_per_s': round(self.bytes / 1e6 / self.total_s, 2) if self.bytes and self.total_s else None,
+            'p50_ms': _ms(percentile(self.latencies, 0.50)),
+            'p95_ms': _ms(percentile(self.latencies, 0.95)),
+            'p99_ms': _ms(percentile(self.latencies, 0.99)),
+            'max_ms': _ms(max(self.latencies) if self.latencies else None),
+            # Cumulative process peaks when the stage finished, see peak_rss_mb
+            'process_peak_rss_mb': own_rss,
+            'process_peak_child_rss_mb': children_rss,
+        }
+        result.update(self.extra)
+        return result
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def cost_at_duplicate_ratio(corpus, latencies, duplicate_ratio):
+    """Mean per-video cost in ms when ``duplicate_ratio`` of the videos checked are re-uploads.
+
+    The synthetic corpus is mostly variants, far more than real search
+    results, so originals and variants are averaged separately and weighted.
+    """
+    unique = [seconds for entry, seconds in zip(corpus, latencies) if entry['variant'] is None]
+    duplicates = [seconds for entry, seconds in zip(corpus, latencies) if entry['variant'] is not None]
+    if not unique or not duplicates:
+        return None
+    return _ms(
+        (1 - duplicate_ratio) * sum(unique) / len(unique) + duplicate_ratio * sum(duplicates) / len(duplicates)
+    )
+
+
+def fake_catalog(corpus, off_brand, rng):
+    """Search results for the corpus plus off-brand noise, as FakeYouTubeService videos"""
+    videos = []
+    for n, entry in enumerate(corpus):
+        videos.append({
+            'id': f"vid{n:05d}",
+            'title': f"{BRAND_NAME} ritual #{n}",
+            'description': f"Morning routine with #{BRAND_KEYWORDS[-1].lstrip('#')} " + "lorem ipsum " * 30,
+            'duration': 10,
+            'file': os.path.basename(entry['path']),
+        })
+    for n in range(off_brand):
+        videos.append({
+            'id': f"off{n:05d}",
+            'title': f"Unrelated clip {rng.randint(0, 10 ** 6)}",
+            'description': "nothing to see here " * 20,
+            'duration': 30,
+        })
+    rng.shuffle(videos)
+    return videos
+
+
+def bench_discovery(scraper, service, budget):
+    timer = StageTimer("discovery")
+    with timer:
+        urls = timer.measure(scraper.search_videos, BRAND_NAME, max_results=budget)
+        metadata = timer.measure(scraper.fetch_metadata, urls)
+    timer.extra = {
+        'videos_found': len(urls),
+        'videos_per_s': round(len(urls) / timer.total_s, 2) if timer.total_s else None,
+        'dropped_in_search': len(scraper.search_rejected),
+        'api_calls': dict(service.calls),
+        'quota_units': service.quota_used,
+    }
+    return timer, metadata
+
+
+def bench_brand_filter(metadata, repeat):
+    timer = StageTimer("brand_filter")
+    items = [m for m in metadata if m] * repeat
+    with timer:
+        for item in items:
+            timer.measure(filter_video_metadata, item)
+    return timer
+
+
+def bench_download(scraper, media, corpus):
+    timer = StageTimer("download")
+    paths = []
+    with timer:
+        for entry in corpus:
+            url = media.url_for(os.path.basename(entry['path']))
+            result = timer.measure(scraper.download_video, url, size=os.path.getsize(entry['path']))
+            paths.append(result['file_path'] if result else None)
+    timer.extra = {'failed': sum(1 for path in paths if path is None)}
+    return timer
+
+
+def bench_content_hash(corpus):
+    timer = StageTimer("content_hash")
+    with timer:
+        for entry in corpus:
+            timer.measure(generate_video_hash, entry['path'], size=os.path.getsize(entry['path']))
+    return timer
+
+
+def bench_perceptual_hash(corpus):
+    timer = StageTimer("perceptual_hash")
+    deduplicator = VideoDeduplicator(DEDUP_THRESHOLD, use_audio=False)
+    with timer:
+        for entry in corpus:
+            entry['perceptual_hash'] = timer.measure(deduplicator.calculate_video_hash, entry['path'])
+    return timer
+
+
+def bench_dedup(corpus, work_dir, audio=False):
+    """Dedup latency plus accuracy: variants should match their original, originals nothing.
+
+    Frame-only dedup starts from the hashes of the perceptual_hash stage.
+    With ``audio`` every video starts unhashed: the soundtrack is
+    fingerprinted first and frames are hashed only when it asks for it, so
+    the timings include all hashing, also of originals hashed on demand
+    (the corpus files stand in for the raw cache). As in the pipeline, the indexes are
+    on disk and the checks run on another thread than the one that opened
+    them.
+    """
+    name = "dedup_audio" if audio else "dedup"
+    timer = StageTimer(name)
+    deduplicator = VideoDeduplicator(
+        DEDUP_THRESHOLD, os.path.join(work_dir, f"{name}_hashes.db"),
+        audio_index_path=os.path.join(work_dir, f"{name}_audio.db"), use_audio=audio,
+        frame_source=lambda path: path
+    )
+    dedup_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedup")
+    true_positive = false_positive = false_negative = frames_skipped = 0
+
+    def check_with_audio(path):
+        video_hash, fingerprint = deduplicator.calculate_hashes(path, key=path)
+        result = deduplicator.is_duplicate(path, video_hash, key=path, audio_fingerprint=fingerprint)
+        return result, video_hash is None
+
+    def in_dedup_thread(func, *args, **kwargs):
+        return dedup_thread.submit(func, *args, **kwargs).result()
+
+    with timer:
+        for entry in corpus:
+            if audio:
+                (is_duplicate, _), skipped = timer.measure(in_dedup_thread, check_with_audio, entry['path'])
+                frames_skipped += skipped
+            else:
+                is_duplicate, _ = timer.measure(
+                    in_dedup_thread, deduplicator.is_duplicate, entry['path'], entry['perceptual_hash'],
+                    key=entry['path']
+                )
+            expected = entry['variant'] is not None
+            true_positive += is_duplicate and expected
+            false_positive += is_duplicate and not expected
+            false_negative += expected and not is_duplicate
+    dedup_thread.shutdown()
+    deduplicator.close()
+    flagged = true_positive + false_positive
+    expected = true_positive + false_negative
+    timer.extra = {
+        'precision': round(true_positive / flagged, 3) if flagged else None,
+        'recall': round(true_positive / expected, 3) if expected else None,
+        'false_positives': false_positive,
+        'missed_duplicates': false_negative,
+    }
+    if audio:
+        timer.extra['frame_hashing_skipped'] = frames_skipped
+    return timer
+
+
+def bench_transcode(corpus, output_dir, force=False):
+    """Normalize every video as planned, or (force) with a full re-encode to measure the encoder"""
+    timer = StageTimer("transcode_full" if force else "transcode")
+    converter = VideoConverter(output_dir)
+    actions = {}
+    outputs = []
+
+    def plan_and_normalize(path, name):
+        plan = converter.plan_video(path)
+        if force:
+            plan['action'] = "transcode"
+        actions[plan['action']] = actions.get(plan['action'], 0) + 1
+        return converter.normalize_video(path, name, plan)
+
+    with timer:
+        for n, entry in enumerate(corpus):
+            outputs.append(timer.measure(
+                plan_and_normalize, entry['path'], f"{timer.name}_{n}", size=os.path.getsize(entry['path'])
+            ))
+    timer.extra = {'actions': actions, 'failed': sum(1 for path in outputs if not path)}
+    return timer, [path for path in outputs if path]
+
+
+def bench_upload(paths, work_dir, concurrency):
+    timer = StageTimer("upload")
+    with FakeDriveServer() as drive:
+        uploader = ResumableUploader(
+            lambda: "benchmark-token",
+            base_url=drive.url,
+            session_store=UploadSessionStore(os.path.join(work_dir, "upload_sessions.json")),
+            concurrency=concurrency,
+        )
+        uploads = [(path, os.path.basename(path), "benchmark-folder") for path in paths]
+        with timer:
+            # Latency per file is measured serially, throughput with concurrent uploads
+            for upload in uploads[:max(1, len(uploads) // 2)]:
+                timer.measure(uploader.upload, *upload, size=os.path.getsize(upload[0]))
+            start = time.perf_counter()
+            uploader.upload_many(uploads)
+            concurrent_s = time.perf_counter() - start
+        timer.extra = {
+            'concurrent_files_per_s': round(len(uploads) / concurrent_s, 2) if concurrent_s else None,
+            'concurrency': concurrency,
+            'chunk_requests': drive.chunk_requests,
+        }
+    return timer
+
+
+def bench_metadata(work_dir, rows):
+    timer = StageTimer("metadata")
+    logger = MetadataLogger(os.path.join(work_dir, "metadata.db"), legacy_csv=None)
+    row = {
+        'platform': 'youtube', 'source_url': 'https://www.youtube.com/watch?v=x', 'file_path': '/tmp/x.mp4',
+        'video_id': 'x', 'hashtags': ['AncientBliss', 'ritual'],
+    }
+    with timer:
+        for n in range(rows):
+            timer.measure(logger.log_metadata, dict(row, video_id=str(n)), f"drive{n}", "original")
+        timer.measure(logger.close)
+    return timer
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        ffmpeg_version = subprocess.run(
+            ['ffmpeg', '-version'], capture_output=True, text=True, check=True
+        ).stdout.split('\n', 1)[0]
+    except (OSError, subprocess.CalledProcessError):
+        ffmpeg_version = None
+    return {
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'ffmpeg': ffmpeg_version,
+    }
+
+
+def compare(current, baseline_path):
+    """Print the throughput change of each stage against an earlier result file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['environment'].get('git_commit')}):")
+    for name, stage in current['stages'].items():
+        old = baseline['stages'].get(name, {}).get('items_per_s')
+        new = stage.get('items_per_s')
+        if old and new:
+            print(f"  {name:<16} {old:>10.2f} -> {new:>10.2f} items/s ({(new / old - 1) * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage offline")
+    parser.add_argument('--videos', type=int, default=6, help="synthetic originals to generate")
+    parser.add_argument('--variants', type=int, default=2, help="near-duplicate variants per original")
+    parser.add_argument('--off-brand', type=int, default=120, help="off-brand search results mixed in")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1,
+                        help="share of re-uploads among checked videos, for the per-video dedup cost")
+    parser.add_argument('--full-transcodes', type=int, default=2, help="originals re-encoded to time the encoder")
+    parser.add_argument('--metadata-rows', type=int, default=5000)
+    parser.add_argument('--upload-concurrency', type=int, default=4)
+    parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR, help="where synthetic videos are cached")
+    parser.add_argument('--output', help="JSON result file (default: benchmarks/results/pipeline-<time>.json)")
+    parser.add_argument('--compare', metavar='JSON', help="earlier result file to compare against")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    specs = build_specs(RESOLUTIONS, DURATIONS, args.videos)
+    print(f"Generating corpus in {args.corpus_dir} (cached between runs)")
+    corpus = generate_corpus(args.corpus_dir, specs, args.variants)
+
+    work_dir = tempfile.mkdtemp(prefix="brand_video_bench_")
+    stages = {}
+    try:
+        service = FakeYouTubeService(fake_catalog(corpus, args.off_brand, rng))
+        scraper = YouTubeScraper("benchmark-key", download_dir=os.path.join(work_dir, "raw"))
+        scraper.youtube = service
+        scraper.ydl_opts['noprogress'] = True  # The pool creates its instances on first use
+        # Local fakes need no politeness delays; measure the code, not the rate limits
+        scraper.requests = RequestClient(RateLimiter({'default': (10000.0, 10000)}))
+
+        timer, metadata = bench_discovery(scraper, service, len(service.catalog))
+        stages['discovery'] = timer.summary()
+        stages['brand_filter'] = bench_brand_filter(metadata, 50).summary()
+        with FakeMediaServer(args.corpus_dir) as media:
+            stages['download'] = bench_download(scraper, media, corpus).summary()
+        stages['content_hash'] = bench_content_hash(corpus).summary()
+        hash_timer = bench_perceptual_hash(corpus)
+        stages['perceptual_hash'] = hash_timer.summary()
+        timer = bench_dedup(corpus, work_dir)
+        # Frame-only dedup needs every video hashed first
+        timer.extra['ms_per_video'] = cost_at_duplicate_ratio(
+            corpus, [h + d for h, d in zip(hash_timer.latencies, timer.latencies)], args.duplicate_ratio
+        )
+        stages['dedup'] = timer.summary()
+        timer = bench_dedup(corpus, work_dir, audio=True)
+        timer.extra['ms_per_video'] = cost_at_duplicate_ratio(corpus, timer.latencies, args.duplicate_ratio)
+        stages['dedup_audio'] = timer.summary()
+        timer, outputs = bench_transcode(corpus, os.path.join(work_dir, "processed"))
+        stages['transcode'] = timer.summary()
+        originals = [entry for entry in corpus if entry['variant'] is None][:args.full_transcodes]
+        timer, _ = bench_transcode(originals, os.path.join(work_dir, "encoded"), force=True)
+        stages['transcode_full'] = timer.summary()
+        stages['upload'] = bench_upload(outputs, work_dir, args.upload_concurrency).summary()
+        stages['metadata'] = bench_metadata(work_dir, args.metadata_rows).summary()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'corpus': {'videos': len(corpus), 'bytes': sum(os.path.getsize(entry['path']) for entry in corpus)},
+        'stages': stages,
+    }
+
+    print(f"\n{'stage':<16} {'items':>6} {'items/s':>10} {'MB/s':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, stage in stages.items():
+        print(
+            f"{name:<16} {stage['items']:>6} {stage['items_per_s'] or 0:>10.2f} {stage['mb_per_s'] or 0:>8.2f} "
+            f"{stage['p50_ms'] or 0:>10.2f} {stage['p95_ms'] or 0:>10.2f} {stage['p99_ms'] or 0:>10.2f}"
+        )
+    print(f"dedup precision {stages['dedup']['precision']}, recall {stages['dedup']['recall']}")
+    print(
+        f"dedup with audio prefilter precision {stages['dedup_audio']['precision']}, "
+        f"recall {stages['dedup_audio']['recall']}, "
+        f"frame hashing skipped for {stages['dedup_audio']['frame_hashing_skipped']} videos"
+    )
+    print(
+        f"dedup cost per video at {args.duplicate_ratio:.0%} re-uploads: frames only "
+        f"{stages['dedup']['ms_per_video']} ms, with audio prefilter {stages['dedup_audio']['ms_per_video']} ms"
+    )
+    print(
+        f"peak RSS of the whole run {stages['metadata']['process_peak_rss_mb']} MB "
+        f"(largest ffmpeg child {stages['metadata']['process_peak_child_rss_mb']} MB)"
+    )
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# video_scraper_project/benchmarks/bench_startup.py
+#
+# Cold-start time of the entry points that short-lived workers and cron jobs
+# pay on every launch, each measured in fresh interpreters. Exits with status
+# 1 when a scenario exceeds its budget or loads one of the heavy libraries
+# that should only be imported on first use, so it can gate CI. Run from the
+# project root:
+#
+#     python -m benchmarks.bench_startup [--runs 5] [--budget 0.5]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds on top of a bare interpreter start
+DEFAULT_BUDGET = 0.5
+
+# Libraries that must not be loaded before a video actually needs them
+HEAVY_MODULES = [
+    "cv2", "numpy", "imagehash", "PIL.Image", "ffmpeg", "yt_dlp", "googleapiclient.discovery",
+    "pydrive2.auth", "requests", "httplib2",
+]
+
+REPORT_LOADED = (
+    "from utils.lazy import is_loaded; import json; "
+    f"print(json.dumps([name for name in {HEAVY_MODULES!r} if is_loaded(name)]))"
+)
+
+# name -> interpreter arguments; Python snippets end by printing the heavy modules they loaded
+SCENARIOS = {
+    'interpreter': ["-c", "pass"],
+    'import_run': ["-c", f"import run; {REPORT_LOADED}"],
+    'cli_help': [os.path.join(PROJECT_ROOT, "run.py"), "--help"],
+    'progress': [os.path.join(PROJECT_ROOT, "run.py"), "progress"],
+    'worker_context': ["-c", (
+        "import os; os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark-key'); import run; "
+        "run.PipelineContext(run.create_scrapers(run.PLATFORMS)).close(); "
+        f"{REPORT_LOADED}"
+    )],
+}
+
+
+def launch(arguments, work_dir):
+    """Run one fresh interpreter; returns (wall seconds, heavy modules it loaded or None)"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable] + arguments, cwd=work_dir, env=env, capture_output=True, text=True
+    )
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{completed.stderr}")
+
+    loaded = None
+    lines = completed.stdout.strip().splitlines()
+    if arguments[0] == "-c" and lines and lines[-1].startswith("["):
+        loaded = json.loads(lines[-1])
+    return seconds, loaded
+
+
+def bench(name, arguments, runs, work_dir):
+    launch(arguments, work_dir)  # Warm the bytecode and filesystem caches
+    timings = []
+    loaded = None
+    for _ in range(runs):
+        seconds, loaded = launch(arguments, work_dir)
+        timings.append(seconds)
+    return {
+        'scenario': name,
+        'median_s': statistics.median(timings),
+        'max_s': max(timings),
+        'loaded': loaded or [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start time of the pipeline entry points")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per scenario")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help="allowed median seconds per scenario on top of a bare interpreter start")
+    args = parser.parse_args()
+
+    # Scenarios that create files (queue and index databases) do so in a scratch directory
+    with tempfile.TemporaryDirectory(prefix="brand_video_startup_") as work_dir:
+        os.makedirs(os.path.join(work_dir, "logs"))
+        results = [bench(name, arguments, args.runs, work_dir) for name, arguments in SCENARIOS.items()]
+
+    interpreter = results[0]['median_s']
+    failures = []
+    print(f"{'scenario':<16} {'median ms':>10} {'max ms':>10} {'over python':>12}  heavy modules loaded")
+    for result in results:
+        overhead = result['median_s'] - interpreter
+        print(
+            f"{result['scenario']:<16} {result['median_s'] * 1000:>10.1f} {result['max_s'] * 1000:>10.1f} "
+            f"{overhead * 1000:>12.1f}  {', '.join(result['loaded']) or '-'}"
+        )
+        if overhead > args.budget:
+            failures.append(f"{result['scenario']} took {overhead:.3f}s over the interpreter (budget {args.budget}s)")
+        if result['loaded']:
+            failures.append(f"{result['scenario']} loaded {', '.join(result['loaded'])} at startup")
+
+    if failures:
+        print("\nStartup regressed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nAll scenarios within {args.budget}s of a bare interpreter start")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# video_scraper_project/benchmarks/fake_drive.py
+#
+# A local stand-in for the Drive v3 resumable upload endpoint, for tests and
+# benchmarks. Point DRIVE_UPLOAD_BASE_URL (or ResumableUploader(base_url=...))
+# at FakeDriveServer.url.
+
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeDriveServer:
+    """In-memory Drive upload server.
+
+    ``fail_every`` makes every n-th chunk request fail with a 503 to exercise
+    resuming. Completed uploads are kept in ``files`` (file ID -> metadata
+    and content).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fail_every=0):
+        self.sessions = {}
+        self.files = {}
+        self.fail_every = fail_every
+        self.chunk_requests = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None, headers=None):
+                payload = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                if payload:
+                    self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def do_POST(self):
+                metadata = json.loads(self._body() or b'{}')
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    return self._reply(401, {'error': 'unauthorized'})
+
+                session_id = uuid.uuid4().hex
+                with fake.lock:
+                    fake.sessions[session_id] = {
+                        'metadata': metadata,
+                        'size': int(self.headers['X-Upload-Content-Length']),
+                        'data': bytearray(),
+                    }
+                self._reply(200, headers={'Location': f"{fake.url}/upload/session/{session_id}"})
+
+            def do_PUT(self):
+                body = self._body()
+                session_id = self.path.rsplit('/', 1)[-1]
+                session = fake.sessions.get(session_id)
+                if session is None:
+                    return self._reply(404, {'error': 'session not found'})
+
+                content_range = self.headers.get('Content-Range', '')
+                with fake.lock:
+                    if body:
+                        fake.chunk_requests += 1
+                        if fake.fail_every and fake.chunk_requests % fake.fail_every == 0:
+                            return self._reply(503, {'error': 'injected failure'})
+
+                    match = re.match(r'bytes (\d+)-(\d+)/(\d+)', content_range)
+                    if match and int(match.group(1)) == len(session['data']):
+                        session['data'] += body
+                        fake.bytes_received += len(body)
+
+                    if len(session['data']) >= session['size']:
+                        file_id = uuid.uuid4().hex
+                        fake.files[file_id] = {'metadata': session['metadata'], 'content': bytes(session['data'])}
+                        del fake.sessions[session_id]
+                        return self._reply(200, {'id': file_id})
+
+                    received = len(session['data'])
+                headers = {'Range': f"bytes=0-{received - 1}"} if received else {}
+                self._reply(308, headers=headers)
+
+        return Handler
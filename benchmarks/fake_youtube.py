@@ -0,0 +1,153 @@
+# video_scraper_project/benchmarks/fake_youtube.py
+#
+# Local stand-ins for the YouTube Data API and for the video hosts, for
+# tests and benchmarks. Assign a FakeYouTubeService to YouTubeScraper.youtube
+# and download from FakeMediaServer URLs.
+
+import functools
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Quota units charged by the real API
+QUOTA_COST = {'search': 100, 'videos': 1}
+
+
+class FakeYouTubeService:
+    """In-memory search().list and videos().list over a fixed set of videos.
+
+    ``videos`` are dicts with 'id', 'title' and 'description' and optionally
+    'duration' (seconds) and 'tags'; they are published one hour apart,
+    newest first. ``quota_used`` adds up the quota the calls would cost.
+    """
+
+    def __init__(self, videos):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.catalog = []
+        for n, video in enumerate(videos):
+            published_at = start + timedelta(hours=len(videos) - n)
+            self.catalog.append(dict(video, publishedAt=published_at.strftime('%Y-%m-%dT%H:%M:%SZ')))
+        self.by_id = {video['id']: video for video in self.catalog}
+        self.calls = {'search': 0, 'videos': 0}
+        self.lock = threading.Lock()
+
+    @property
+    def quota_used(self):
+        return sum(QUOTA_COST[name] * count for name, count in self.calls.items())
+
+    def search(self):
+        return _Resource(self._search)
+
+    def videos(self):
+        return _Resource(self._videos)
+
+    def _count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def _search(self, q=None, maxResults=5, pageToken=None, publishedAfter=None, **kwargs):
+        self._count('search')
+        matches = [video for video in self.catalog if not publishedAfter or video['publishedAt'] > publishedAfter]
+        offset = int(pageToken or 0)
+        page = matches[offset:offset + maxResults]
+        response = {
+            'items': [
+                {
+                    'id': {'kind': 'youtube#video', 'videoId': video['id']},
+                    'snippet': {
+                        'title': video['title'],
+                        # Search results only carry the start of the description
+                        'description': video['description'][:160],
+                        'publishedAt': video['publishedAt'],
+                    },
+                }
+                for video in page
+            ]
+        }
+        if offset + maxResults < len(matches):
+            response['nextPageToken'] = str(offset + maxResults)
+        return response
+
+    def _videos(self, id='', part=None, maxResults=None, **kwargs):
+        self._count('videos')
+        items = []
+        for video_id in id.split(','):
+            video = self.by_id.get(video_id)
+            if video is None:
+                continue
+            duration = int(video.get('duration', 0))
+            items.append({
+                'id': video_id,
+                'snippet': {
+                    'title': video['title'],
+                    'description': video['description'],
+                    'channelTitle': video.get('channel', 'Fake Channel'),
+                    'publishedAt': video['publishedAt'],
+                    'tags': video.get('tags', []),
+                },
+                'contentDetails': {'duration': f"PT{duration // 60}M{duration % 60}S"},
+                'statistics': {'viewCount': '100', 'likeCount': '10'},
+            })
+        return {'items': items}
+
+
+class _Resource:
+    def __init__(self, handler):
+        self.handler = handler
+
+    def list(self, **params):
+        return _Request(self.handler, params)
+
+
+class _Request:
+    def __init__(self, handler, params):
+        self.handler = handler
+        self.params = params
+
+    def execute(self, http=None, num_retries=0):
+        return self.handler(**self.params)
+
+
+class FakeMediaServer:
+    """Serve the files of a directory over HTTP, like a video host's CDN"""
+
+    def __init__(self, directory, host='127.0.0.1', port=0):
+        handler = functools.partial(_QuietFileHandler, directory=directory)
+        self.server = _QuietServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def url_for(self, filename):
+        return f"{self.url}/{filename}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Downloaders routinely drop connections after probing a file
+        pass
+
+
+class _QuietFileHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
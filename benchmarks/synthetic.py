@@ -0,0 +1,136 @@
+# video_scraper_project/benchmarks/synthetic.py
+#
+# Deterministic test videos generated with ffmpeg's lavfi sources, plus
+# near-duplicate variants of each (re-encoded, downscaled, cropped,
+# brightened, trimmed). Files are cached by name, so repeated benchmark runs
+# reuse them; CORPUS_VERSION is part of the name and changes with the content.
+
+import os
+import ffmpeg
+
+CORPUS_VERSION = 2
+
+# lavfi sources whose content depends only on their arguments
+SOURCES = [
+    "testsrc2",
+    "smptehdbars",
+    "mandelbrot",
+    "life=ratio=0.3:mold=10:seed={seed}",
+    "cellauto=rule=110:seed={seed}",
+]
+
+# Near-duplicate edits: name -> (video filters as (name, args, kwargs), input seek, output options)
+VARIANTS = {
+    "reencode": ([], None, {'video_bitrate': '300k'}),
+    "scaled": ([('scale', ('iw/2', '-2'), {})], None, {}),
+    "cropped": ([('crop', ('iw*0.9', 'ih*0.9'), {}), ('scale', ('trunc(iw/2)*2', 'trunc(ih/2)*2'), {})], None, {}),
+    "brighter": ([('eq', (), {'brightness': 0.06})], None, {}),
+    "trimmed": ([], 0.5, {}),
+}
+
+
+class VideoSpec:
+    """One synthetic original: size, length and the lavfi source it is drawn from"""
+
+    def __init__(self, index, width, height, duration, fps=30):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.duration = duration
+        self.fps = fps
+
+    @property
+    def name(self):
+        return f"orig{self.index:03d}_{self.width}x{self.height}_{self.duration}s_v{CORPUS_VERSION}"
+
+    @property
+    def source(self):
+        pattern = SOURCES[self.index % len(SOURCES)].format(seed=self.index)
+        name, _, options = pattern.partition('=')
+        size = f"size={self.width}x{self.height}:rate={self.fps}"
+        return f"{name}={options + ':' if options else ''}{size}"
+
+
+def build_specs(resolutions, durations, count):
+    """Cycle through resolutions and durations to describe `count` originals"""
+    specs = []
+    for index in range(count):
+        width, height = resolutions[index % len(resolutions)]
+        duration = durations[(index // len(resolutions)) % len(durations)]
+        specs.append(VideoSpec(index, width, height, duration))
+    return specs
+
+
+def generate_original(spec, out_dir):
+    """Render an H.264/AAC MP4 for a spec, with a soundtrack that depends on the index.
+
+    The soundtrack is a melody of four notes a second over pink noise, both
+    seeded by the index, so every original has its own audio fingerprint.
+    """
+    path = os.path.join(out_dir, f"{spec.name}.mp4")
+    if os.path.exists(path):
+        return path
+
+    video = ffmpeg.input(spec.source, f='lavfi', t=spec.duration)
+    pitch = f"({220 + 40 * spec.index}+110*mod(floor(t*4)*{spec.index % 5 + 3}+{spec.index}\\,7))"
+    melody = ffmpeg.input(f"aevalsrc=0.4*sin(2*PI*t*{pitch}):s=44100", f='lavfi', t=spec.duration)
+    noise = ffmpeg.input(f"anoisesrc=c=pink:r=44100:a=0.1:s={spec.index + 1}", f='lavfi', t=spec.duration)
+    audio = ffmpeg.filter([melody, noise], 'amix', inputs=2)
+    temp_path = f"{path}.tmp.mp4"
+    (
+        ffmpeg.output(
+            video, audio, temp_path,
+            vcodec='libx264', preset='veryfast', pix_fmt='yuv420p', acodec='aac', movflags='+faststart'
+        )
+        .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+    )
+    os.replace(temp_path, path)
+    return path
+
+
+def generate_variant(original_path, variant, out_dir):
+    """Render one near-duplicate edit of an original"""
+    name = os.path.splitext(os.path.basename(original_path))[0].replace("orig", "dup", 1)
+    path = os.path.join(out_dir, f"{name}_{variant}.mp4")
+    if os.path.exists(path):
+        return path
+
+    filters, seek, output_options = VARIANTS[variant]
+    source = ffmpeg.input(original_path, **({'ss': seek} if seek else {}))
+    video = source.video
+    for filter_name, args, kwargs in filters:
+        video = video.filter(filter_name, *args, **kwargs)
+
+    temp_path = f"{path}.tmp.mp4"
+    (
+        ffmpeg.output(
+            video, source.audio, temp_path,
+            vcodec='libx264', preset='veryfast', pix_fmt='yuv420p', acodec='aac', movflags='+faststart',
+            **output_options
+        )
+        .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+    )
+    os.replace(temp_path, path)
+    return path
+
+
+def generate_corpus(out_dir, specs, variants_per_video=2):
+    """Generate originals and their variants.
+
+    Returns a list of dicts with 'path', 'group' (the index of the original
+    it derives from) and 'variant' (None for originals).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    variant_names = list(VARIANTS)
+    corpus = []
+    for spec in specs:
+        original = generate_original(spec, out_dir)
+        corpus.append({'path': original, 'group': spec.index, 'variant': None})
+        for n in range(variants_per_video):
+            variant = variant_names[(spec.index + n) % len(variant_names)]
+            corpus.append({
+                'path': generate_variant(original, variant, out_dir),
+                'group': spec.index,
+                'variant': variant,
+            })
+    return corpus
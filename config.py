@@ -25,19 +25,124 @@ DRIVE_TOKEN_FILE = os.getenv("DRIVE_TOKEN_FILE", "token.json")
 # Google Drive root folder for uploads
 DRIVE_ROOT_FOLDER_ID = os.getenv("DRIVE_ROOT_FOLDER_ID", "your-folder-id")
 
+# Resumable uploads (chunked, resumed after failures or restarts)
+DRIVE_RESUMABLE_UPLOADS = True
+DRIVE_UPLOAD_BASE_URL = os.getenv("DRIVE_UPLOAD_BASE_URL", "https://www.googleapis.com")
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Rounded down to a multiple of 256 KiB
+UPLOAD_CONCURRENCY = 4  # Files uploaded at once over a shared connection pool
+UPLOAD_SESSIONS_FILE = "./data/upload_sessions.json"
+DRIVE_FOLDER_CACHE_FILE = "./data/drive_folders.json"  # Folder IDs keyed by parent and name
+
 # Processing configuration
 MAX_VIDEO_RESOLUTION = "1080p"
 OUTPUT_FORMAT = "mp4"
 TEMP_VIDEO_DIR = "./data/videos/temp"
 PROCESSED_VIDEO_DIR = "./data/videos/processed"
 
+# Watermark removal (static overlays found from sampled frames, removed by the normalization encode).
+# Opt-in: detection samples every video, any box found forces a full lossy re-encode instead of a remux
+# or link, and delogo blurs whatever is in the box, including the brand's own on-screen logo.
+WATERMARK_REMOVAL = False
+WATERMARK_SAMPLE_FRAMES = 12  # Keyframes sampled per video for detection
+WATERMARK_ANALYSIS_WIDTH = 320  # Frames are analyzed at this width
+WATERMARK_MAX_AREA = 0.08  # Masks covering more of the frame are treated as a static scene, not an overlay
+WATERMARK_CACHE_FILE = "./data/watermark_masks.json"  # Masks per platform, creator and aspect ratio
+WATERMARK_CACHE_MAX_USES = 50  # Detect again after a cached mask was reused this many times
+
 # Scraping configuration
 REQUEST_DELAY = 2  # seconds between requests
+# Requests per second and burst size per platform or API, halved on every 429 and recovered gradually
+RATE_LIMITS = {
+    "default": (1 / REQUEST_DELAY, 2),
+    "youtube": (1.0, 4),  # yt-dlp page and media requests
+    "youtube_api": (10.0, 10),  # YouTube Data API
+}
+REQUEST_WORKERS = 8  # Concurrent requests per scraper
 MAX_RETRIES = 3
 TIMEOUT = 30
+YTDL_POOL_SIZE = 4  # Reusable yt-dlp sessions per scraper (one per download worker)
+YOUTUBE_SEARCH_BUDGET = 200  # Most search results paged through per run; older ones past it are skipped
+YOUTUBE_SEARCH_PAGE_SIZE = 50  # Results per search().list page (API max 50)
+YOUTUBE_METADATA_SOURCE = "api"  # "api": batched videos().list calls, "ytdlp": a yt-dlp page scrape per video
+SEARCH_PREFILTER = True  # Drop search results whose title and description snippet miss every BRAND_KEYWORDS entry
+PLATFORM_SEARCH_BUDGET = 100  # Most listing entries collected per yt-dlp platform (TikTok, Instagram, ...) per run
+# Extra listing pages yt-dlp can enumerate per platform (brand accounts, pages, playlists)
+PLATFORM_SOURCES = {
+    # @account pages, e.g. "https://www.tiktok.com/@ancientbliss"; TikTok hashtag pages are not supported
+    # by yt-dlp, so without an account here TikTok discovery finds nothing
+    "tiktok": [],
+    "instagram": [],
+    "twitter": [],
+    "facebook": [],
+}
+
+# Pipeline configuration
+PIPELINE_QUEUE_SIZE = 4  # Max videos waiting between two stages (caps disk usage)
+PIPELINE_WORKERS = {
+    "download": 4,   # threads (network-bound)
+    "hash": 2,       # processes (CPU-bound)
+    "dedup": 1,      # must stay 1: checks and updates the known hashes
+    "upload": UPLOAD_CONCURRENCY,  # threads (network-bound)
+}
+
+# Streaming mode: download, hash, sample frames and transcode in one pass without a raw file.
+# Only single-file formats can be streamed; videos whose best one is below the quality of the separate
+# streams (YouTube serves at most 360p as a single file) fall back to the download path.
+STREAMING_MODE = False
+STREAM_FORMAT = "best[ext=mp4][vcodec!=none][acodec!=none]/best[vcodec!=none][acodec!=none]"  # Single-file formats only
+STREAM_CHUNK_SIZE = 1024 * 1024  # Bytes read from the download per write to ffmpeg
+STREAM_SAMPLE_FPS = 1  # Dedup thumbnails per second of video, decoded during the transcode
+
+# Transcoding configuration (ffmpeg jobs run in parallel, cheapest first)
+TRANSCODE_MAX_JOBS = None  # Parallel ffmpeg jobs, None = CPU count / threads per job
+TRANSCODE_THREADS_PER_JOB = 4  # ffmpeg -threads for each job
+SEGMENT_ENCODE_MIN_DURATION = None  # Seconds; longer videos are encoded in parallel segments (None = off)
+SEGMENT_DURATION = 60  # Target segment length in seconds (cuts land on the next keyframe)
+SEGMENT_ENCODE_WORKERS = None  # Parallel segment encodes per job, None = the job's threads / 2
+
+# Metadata store (rows are buffered and written to SQLite in batches)
+METADATA_DB = "./data/metadata.db"
+METADATA_LEGACY_CSV = "./data/metadata_log.csv"  # Imported once when the database is first created
+METADATA_FLUSH_ROWS = 50  # Flush after this many buffered rows
+METADATA_FLUSH_SECONDS = 5  # ... or after this many seconds
+
+# Metrics (per-stage timings and outcomes, exported during and after each run)
+METRICS_PREFIX = "video_pipeline"
+METRICS_DIR = "./logs/metrics"  # pipeline.prom (Prometheus textfile collector) and pipeline.json
+METRICS_EXPORT_INTERVAL = 30  # Seconds between exports while running (0 = only at the end)
+TRACE_FILE = "./logs/traces.jsonl"  # One JSON line per video with a span per stage
+
+# Bulk work queue (URL lists ingested with `run.py ingest`, processed by `run.py work`)
+WORK_QUEUE_DB = "./data/work_queue.db"
+WORK_QUEUE_JOURNAL_MODE = "WAL"  # Use "DELETE" when workers on several hosts share the file over a network filesystem
+WORK_BATCH_SIZE = 10  # Items claimed at a time by a worker
+WORK_LEASE_SECONDS = 30 * 60  # Claimed items return to the queue if their worker stops renewing the lease
+WORK_MAX_ATTEMPTS = 3  # Claims of an item before it is marked failed
+
+# Raw download cache (content-addressed, lets `run.py reprocess` replay the pipeline without downloading)
+RAW_CACHE = False
+RAW_CACHE_DIR = "./data/raw_cache"
+RAW_CACHE_MAX_BYTES = 50 * 1024 ** 3  # Least recently used videos are evicted above this size
+
+# Seen-video index (skips already handled videos across runs)
+VIDEO_INDEX_DB = "./data/video_index.db"
+VIDEO_MAX_ATTEMPTS = 3  # Failed runs after which a video (private, removed, geo-blocked) is given up
+CONTENT_HASH_ALGORITHM = "blake2b"  # blake2b, md5, sha256 or xxhash (needs the xxhash package)
 
 # Deduplication configuration
 DEDUP_THRESHOLD = 5  # Hash difference threshold for duplicates
+HASH_INDEX_DB = "./data/hash_index.db"  # Perceptual hashes of every kept video
+DEDUP_SAMPLING = "keyframe"  # "keyframe" (fast, timestamp seeks) or "seek" (OpenCV frame seeks)
+DEDUP_NUM_SAMPLES = 3  # Frames sampled per video, one per equal-length segment
+
+# Audio fingerprints (soundtrack peak hashes, a cheap first pass before frame hashing)
+AUDIO_FINGERPRINT = True
+AUDIO_INDEX_DB = "./data/audio_index.db"
+AUDIO_FP_SAMPLE_RATE = 8000  # The soundtrack is decoded as mono at this rate
+AUDIO_FP_MAX_SECONDS = 180  # Only the start of longer soundtracks is fingerprinted
+AUDIO_CANDIDATE_SCORE = 0.05  # Share of time-aligned hashes that makes a known video a candidate
+AUDIO_DUPLICATE_SCORE = 0.15  # Share that counts as a duplicate even when frames differ (cropped, mirrored)
+AUDIO_PREFILTER = True  # Hash frames only on a partial soundtrack match; the matched original is hashed from RAW_CACHE if kept without one (misses music-swapped re-uploads)
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
 
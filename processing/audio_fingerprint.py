@@ -0,0 +1,211 @@
+# video_scraper_project/processing/audio_fingerprint.py
+
+import os
+import sqlite3
+import threading
+from config import AUDIO_FP_SAMPLE_RATE, AUDIO_FP_MAX_SECONDS
+from utils.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+ffmpeg = lazy_import("ffmpeg")
+np = lazy_import("numpy")
+
+# Spectrogram: 128 ms windows every 32 ms at 8 kHz
+FFT_SIZE = 1024
+HOP_SIZE = 256
+# A peak is the loudest point of this many frames x frequency bins, and this many dB above the median
+PEAK_NEIGHBORHOOD = (11, 21)
+PEAK_MIN_DB = 10
+PEAKS_PER_SECOND = 30
+# Every peak is paired with the next few peaks up to MAX_DELTA frames later
+FAN_OUT = 5
+MAX_DELTA = 63
+# Hashes repeated this often in one soundtrack (drones, pure tones) say nothing about it
+MAX_HASH_REPEATS = 50
+# SQLite host parameters per IN (...) lookup
+QUERY_CHUNK = 500
+
+
+class AudioFingerprinter:
+    """Landmark fingerprints of a video's soundtrack.
+
+    The audio is decoded as a low-rate mono track, which costs a fraction
+    of decoding frames. Spectrogram peaks are paired into hashes of (first
+    frequency, second frequency, time between them), each stored with the
+    time of its first peak. The hashes survive re-encoding, volume changes
+    and trimming, and a cropped, mirrored or re-framed re-upload has the
+    same soundtrack.
+    """
+
+    def __init__(self, sample_rate=AUDIO_FP_SAMPLE_RATE, max_seconds=AUDIO_FP_MAX_SECONDS):
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+
+    def decode(self, video_path):
+        """Return the soundtrack as float32 samples, or None if there is none"""
+        try:
+            out, _ = (
+                ffmpeg.input(video_path, t=self.max_seconds)
+                .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=self.sample_rate, vn=None)
+                .global_args('-loglevel', 'error')
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error:
+            # Also raised for videos without an audio stream
+            return None
+        if len(out) < 2 * FFT_SIZE:
+            return None
+        return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768
+
+    def fingerprint_file(self, video_path):
+        """Fingerprint a video's soundtrack; None when it has no audible audio"""
+        samples = self.decode(video_path)
+        if samples is None:
+            return None
+        return self.fingerprint(samples)
+
+    def fingerprint(self, samples):
+        """Return (hashes, offsets) as uint32 and int32 arrays, or None for silence"""
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::HOP_SIZE]
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE).astype(np.float32), axis=1))
+        spectrum = (20 * np.log10(spectrum + 1e-6)).astype(np.float32)
+
+        # Local maxima: equal to the maximum of their neighborhood
+        neighborhood = cv2.dilate(spectrum, np.ones(PEAK_NEIGHBORHOOD, np.uint8))
+        peaks = (spectrum == neighborhood) & (spectrum > np.median(spectrum) + PEAK_MIN_DB)
+        times, freqs = np.nonzero(peaks)
+        if len(times) < 2:
+            return None
+
+        # Keep the strongest peaks, then put them back in time order
+        limit = max(2, int(PEAKS_PER_SECOND * len(samples) / self.sample_rate))
+        if len(times) > limit:
+            strongest = np.argpartition(spectrum[times, freqs], -limit)[-limit:]
+            times, freqs = times[strongest], freqs[strongest]
+        order = np.lexsort((freqs, times))
+        times, freqs = times[order], freqs[order]
+
+        hashes = []
+        offsets = []
+        for step in range(1, FAN_OUT + 1):
+            delta = times[step:] - times[:-step]
+            valid = (delta > 0) & (delta <= MAX_DELTA)
+            anchor_freqs = freqs[:-step][valid].astype(np.uint32)
+            target_freqs = freqs[step:][valid].astype(np.uint32)
+            hashes.append((anchor_freqs << 16) | (target_freqs << 6) | delta[valid].astype(np.uint32))
+            offsets.append(times[:-step][valid].astype(np.int32))
+        hashes = np.concatenate(hashes)
+        if not len(hashes):
+            return None
+        return hashes, np.concatenate(offsets)
+
+
+class AudioIndex:
+    """Persistent lookup from fingerprint hashes to the videos and times they occur at.
+
+    A match is found by voting: every hash shared with a known video votes
+    for the time shift between the two, and only hashes agreeing on one
+    shift count. The score is the share of the shorter soundtrack's hashes
+    that line up, so a clip cut from a longer video still scores high.
+    """
+
+    def __init__(self, db_path=None):
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path or ":memory:", timeout=30, check_same_thread=False)
+        if db_path:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS audio_keys (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL UNIQUE,
+                    hash_count INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    hash INTEGER NOT NULL,
+                    key_id INTEGER NOT NULL,
+                    offset INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON fingerprints (hash);
+            """)
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM audio_keys").fetchone()[0]
+
+    def add(self, key, fingerprint):
+        """Insert (or replace) the fingerprint stored for a key"""
+        hashes, offsets = fingerprint
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT id FROM audio_keys WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM fingerprints WHERE key_id = ?", (row[0],))
+                self.conn.execute("UPDATE audio_keys SET hash_count = ? WHERE id = ?", (len(hashes), row[0]))
+                key_id = row[0]
+            else:
+                key_id = self.conn.execute(
+                    "INSERT INTO audio_keys (key, hash_count) VALUES (?, ?)", (key, len(hashes))
+                ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO fingerprints (hash, key_id, offset) VALUES (?, ?, ?)",
+                zip(hashes.tolist(), [key_id] * len(hashes), offsets.tolist())
+            )
+
+    def match(self, fingerprint, exclude=None):
+        """Return (key, score) of the best matching known soundtrack, or None.
+
+        ``exclude`` is a key never returned (the video itself).
+        """
+        hashes, offsets = fingerprint
+        values, counts = np.unique(hashes, return_counts=True)
+        values = values[counts <= MAX_HASH_REPEATS]
+        if not len(values):
+            return None
+
+        rows = []
+        with self.lock:
+            for start in range(0, len(values), QUERY_CHUNK):
+                chunk = values[start:start + QUERY_CHUNK].tolist()
+                rows += self.conn.execute(
+                    f"SELECT hash, key_id, offset FROM fingerprints WHERE hash IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+        if not rows:
+            return None
+        found = np.array(rows, dtype=np.int64)
+
+        # Pair every stored occurrence with every occurrence of the same hash in the query
+        order = np.argsort(hashes, kind='stable')
+        sorted_hashes = hashes[order].astype(np.int64)
+        sorted_offsets = offsets[order].astype(np.int64)
+        left = np.searchsorted(sorted_hashes, found[:, 0], 'left')
+        repeats = np.searchsorted(sorted_hashes, found[:, 0], 'right') - left
+        stored = np.repeat(np.arange(len(found)), repeats)
+        within = np.arange(len(stored)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        shifts = found[stored, 2] - sorted_offsets[left[stored] + within]
+
+        # Votes per (video, time shift); a shift that is not a whole number of
+        # frames splits its votes between two neighbors, so those are added up
+        votes_for = found[stored, 1] * (1 << 32) + (shifts + (1 << 31))
+        candidates, exact_votes = np.unique(votes_for, return_counts=True)
+        votes = exact_votes.copy()
+        for neighbor in (candidates - 1, candidates + 1):
+            position = np.minimum(np.searchsorted(candidates, neighbor), len(candidates) - 1)
+            votes += np.where(candidates[position] == neighbor, exact_votes[position], 0)
+        for best in np.argsort(votes)[::-1]:
+            key_id = int(candidates[best] >> 32)
+            with self.lock:
+                key, hash_count = self.conn.execute(
+                    "SELECT key, hash_count FROM audio_keys WHERE id = ?", (key_id,)
+                ).fetchone()
+            if key == exclude:
+                continue
+            score = min(1.0, int(votes[best]) / max(1, min(len(hashes), hash_count)))
+            return key, score
+        return None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
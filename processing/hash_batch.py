@@ -0,0 +1,83 @@
+# video_scraper_project/processing/hash_batch.py
+
+from processing.hash_index import hash_to_int
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Set bits per byte, for NumPy versions without np.bitwise_count
+_POPCOUNT_TABLE = [bin(i).count('1') for i in range(256)]
+
+
+def pack_hashes(hashes):
+    """Pack ImageHash objects, hex strings or ints into a uint64 array"""
+    return np.array(
+        [h if isinstance(h, (int, np.integer)) else hash_to_int(h) for h in hashes],
+        dtype=np.uint64
+    )
+
+
+def popcount64(values):
+    """Count set bits of every element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    values = np.ascontiguousarray(values)
+    table = np.array(_POPCOUNT_TABLE, dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def hamming_distances(queries, matrix):
+    """Hamming distances between each query and every row of the matrix.
+
+    ``queries`` is a single packed hash or an array of them; the result has
+    shape (len(queries), len(matrix)).
+    """
+    queries = np.atleast_1d(np.asarray(queries, dtype=np.uint64))
+    return popcount64(np.bitwise_xor(queries[:, None], matrix[None, :]))
+
+
+def find_duplicate_pairs(matrix, threshold, block_size=1024):
+    """All pairs (i, j, distance) with i < j whose hashes are within the threshold.
+
+    Rows are compared block by block against the rest of the matrix, so
+    memory stays at block_size * len(matrix) bytes.
+    """
+    pairs_i, pairs_j, pairs_d = [], [], []
+    for start in range(0, len(matrix), block_size):
+        block = matrix[start:start + block_size]
+        distances = hamming_distances(block, matrix[start:])
+
+        # Keep the upper triangle only: each pair once, no self matches
+        rows, cols = np.nonzero(distances <= threshold)
+        keep = cols > rows
+        rows, cols = rows[keep], cols[keep]
+
+        pairs_i.append(rows + start)
+        pairs_j.append(cols + start)
+        pairs_d.append(distances[rows, cols])
+
+    if not pairs_i:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.uint8)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j), np.concatenate(pairs_d)
+
+
+def group_duplicates(num_hashes, pairs_i, pairs_j):
+    """Merge duplicate pairs into groups of row indices (union-find)"""
+    parent = list(range(num_hashes))
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for i, j in zip(pairs_i.tolist(), pairs_j.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for row in sorted(set(pairs_i.tolist()) | set(pairs_j.tolist())):
+        groups.setdefault(find(row), []).append(row)
+    return list(groups.values())
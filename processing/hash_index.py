@@ -0,0 +1,206 @@
+# video_scraper_project/processing/hash_index.py
+
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from itertools import combinations
+
+
+def hash_to_int(video_hash):
+    """Convert an ImageHash (or hex string) to an integer"""
+    return int(str(video_hash), 16)
+
+
+class HashIndex:
+    """Persistent perceptual-hash index with sublinear near-duplicate lookup.
+
+    Uses multi-index hashing: every hash is split into ``m`` chunks and each
+    chunk position has its own hash table. Two hashes within ``threshold``
+    bits of each other differ by at most ``threshold // m`` bits in at least
+    one chunk, so a query only probes the table buckets within that radius
+    and compares against the few entries found there instead of against the
+    whole archive. Wide chunks (about 21 bits) keep buckets nearly empty even
+    with hundreds of thousands of entries.
+
+    The index is shared by the threads of a pipeline (it is created on the
+    main thread and used by the dedup stage), so every access holds a lock.
+    Other processes (parallel workers, a sweep) add to the same database;
+    ``add_if_new`` picks up their rows and decides inside one write
+    transaction, so two near-duplicates processed at once are never both
+    kept.
+    """
+
+    def __init__(self, db_path=None, threshold=5, hash_bits=64, num_chunks=None):
+        self.threshold = threshold
+        self.hash_bits = hash_bits
+        self.keys = []
+        self.hashes = []  # Parallel to keys, None for replaced entries
+        self.rows = {}  # key -> position in keys/hashes
+        self.lock = threading.Lock()
+        self.last_rowid = 0  # Newest database row already in memory
+
+        if num_chunks is None:
+            num_chunks = max(1, min(threshold + 1, hash_bits // 21))
+        bounds = [hash_bits * i // num_chunks for i in range(num_chunks + 1)]
+        self.chunks = [(bounds[i], (1 << (bounds[i + 1] - bounds[i])) - 1) for i in range(num_chunks)]
+        self.tables = [defaultdict(list) for _ in self.chunks]
+
+        # Bit flips to probe around each chunk value
+        radius = threshold // num_chunks
+        self.probes = [
+            _flip_masks(bounds[i + 1] - bounds[i], radius) for i in range(num_chunks)
+        ]
+
+        self.conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            with self.conn:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash TEXT NOT NULL)"
+                )
+            self.load()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.rows)
+
+    def __contains__(self, key):
+        with self.lock:
+            if key not in self.rows and self.conn is not None:
+                self._load()
+            return key in self.rows
+
+    def items(self):
+        """Return the (key, hash) pairs currently stored, as ints"""
+        with self.lock:
+            return [(key, self.hashes[row]) for key, row in self.rows.items()]
+
+    def load(self):
+        """Bulk load the persisted hashes not in memory yet (all of them the first time)"""
+        with self.lock:
+            self._load()
+
+    def add(self, key, video_hash):
+        """Insert (or replace) the hash stored for a key"""
+        self.add_many([(key, video_hash)])
+
+    def add_many(self, entries):
+        """Insert many (key, hash) pairs in one transaction"""
+        rows = []
+        with self.lock:
+            for key, video_hash in entries:
+                value = video_hash if isinstance(video_hash, int) else hash_to_int(video_hash)
+                self._insert(key, value)
+                rows.append((key, format(value, 'x')))
+
+            if self.conn is not None and rows:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO hashes (key, hash) VALUES (?, ?)", rows)
+
+    def add_if_new(self, key, video_hash):
+        """Insert the hash of a key unless a near-duplicate is stored; returns that (key, distance) or None.
+
+        Rows added by other processes are loaded first, and the check and
+        the insert run in one write transaction, so a concurrent worker
+        cannot add a near-duplicate in between.
+        """
+        value = video_hash if isinstance(video_hash, int) else hash_to_int(video_hash)
+        with self.lock:
+            if self.conn is None:
+                matches = self._query(value, self.threshold, key)
+                if not matches:
+                    self._insert(key, value)
+                return matches[0] if matches else None
+
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self._load()
+                matches = self._query(value, self.threshold, key)
+                if not matches:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO hashes (key, hash) VALUES (?, ?)", (key, format(value, 'x'))
+                    )
+            if not matches:
+                self._insert(key, value)
+            return matches[0] if matches else None
+
+    def query(self, video_hash, threshold=None, exclude=None):
+        """Return all (key, distance) pairs within the threshold, closest first.
+
+        ``exclude`` is a key never returned (the video itself).
+        """
+        if threshold is None:
+            threshold = self.threshold
+        if threshold > self.threshold:
+            raise ValueError(f"Index was built for threshold <= {self.threshold}, got {threshold}")
+
+        value = video_hash if isinstance(video_hash, int) else hash_to_int(video_hash)
+        with self.lock:
+            return self._query(value, threshold, exclude)
+
+    def nearest(self, video_hash, threshold=None, exclude=None):
+        """Return the closest (key, distance) within the threshold, or None"""
+        matches = self.query(video_hash, threshold, exclude)
+        return matches[0] if matches else None
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _load(self):
+        for rowid, key, hash_hex in self.conn.execute(
+            "SELECT rowid, key, hash FROM hashes WHERE rowid > ? ORDER BY rowid", (self.last_rowid,)
+        ):
+            self._insert(key, int(hash_hex, 16))
+            self.last_rowid = rowid
+
+    def _query(self, value, threshold, exclude):
+        checked = set()
+        matches = []
+        for table, (shift, mask), flips in zip(self.tables, self.chunks, self.probes):
+            chunk = (value >> shift) & mask
+            for flip in flips:
+                for row in table.get(chunk ^ flip, ()):
+                    if row in checked:
+                        continue
+                    checked.add(row)
+
+                    stored = self.hashes[row]
+                    if stored is None or self.keys[row] == exclude:
+                        continue
+                    distance = (value ^ stored).bit_count()
+                    if distance <= threshold:
+                        matches.append((self.keys[row], distance))
+
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def _insert(self, key, value):
+        old_row = self.rows.get(key)
+        if old_row is not None:
+            if self.hashes[old_row] == value:
+                return
+            self.hashes[old_row] = None
+
+        row = len(self.keys)
+        self.keys.append(key)
+        self.hashes.append(value)
+        self.rows[key] = row
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            table[(value >> shift) & mask].append(row)
+
+
+def _flip_masks(bits, radius):
+    """All bit masks over `bits` bits with at most `radius` bits set"""
+    masks = []
+    for count in range(radius + 1):
+        for positions in combinations(range(bits), count):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return masks
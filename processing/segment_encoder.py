@@ -0,0 +1,105 @@
+# video_scraper_project/processing/segment_encoder.py
+
+import glob
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from config import TEMP_VIDEO_DIR, SEGMENT_DURATION, SEGMENT_ENCODE_WORKERS
+from processing.watermark_removal import apply_delogo
+from utils.lazy import lazy_import
+
+ffmpeg = lazy_import("ffmpeg")
+
+
+class SegmentEncoder:
+    """Encode a long video as independent segments in parallel.
+
+    The video stream is split at keyframes with a stream copy, every
+    segment is encoded by its own ffmpeg process, the audio track is encoded
+    once alongside them (per-segment AAC would leave gaps at the joins) and
+    the results are concatenated without re-encoding.
+
+    ``threads`` is the encoder thread allotment of the job (the transcode
+    scheduler's threads per job); the parallel segments share it rather
+    than each taking a share of the whole machine.
+    """
+
+    def __init__(self, video_options, audio_options, segment_duration=SEGMENT_DURATION,
+                 workers=SEGMENT_ENCODE_WORKERS, threads_per_segment=2, threads=None, temp_dir=TEMP_VIDEO_DIR):
+        budget = threads or os.cpu_count() or 1
+        self.video_options = video_options
+        self.audio_options = audio_options
+        self.segment_duration = segment_duration
+        self.threads_per_segment = max(1, min(threads_per_segment, budget))
+        self.workers = workers or max(1, budget // self.threads_per_segment)
+        self.temp_dir = temp_dir
+
+    def encode(self, input_path, output_path, width, height, has_audio=True, watermarks=None, progress=None):
+        """Encode input_path into output_path at the given size, removing any watermark boxes"""
+        work_dir = os.path.join(self.temp_dir, os.path.splitext(os.path.basename(output_path))[0] + "_segments")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+
+        try:
+            # Split the video stream at keyframes, no decoding involved
+            (
+                ffmpeg.input(input_path)
+                .video
+                .output(
+                    os.path.join(work_dir, "source_%05d.mkv"),
+                    c='copy',
+                    f='segment',
+                    segment_time=self.segment_duration,
+                    reset_timestamps=1
+                )
+                .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            )
+            sources = sorted(glob.glob(os.path.join(work_dir, "source_*.mkv")))
+            encoded = [
+                os.path.join(work_dir, os.path.basename(path).replace("source_", "encoded_")) for path in sources
+            ]
+            audio_path = os.path.join(work_dir, "audio.m4a")
+
+            done = []
+
+            def encode_segment(source, target):
+                (
+                    apply_delogo(ffmpeg.input(source).video, watermarks)
+                    .output(target, s=f"{width}x{height}", threads=self.threads_per_segment, **self.video_options)
+                    .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+                )
+                done.append(target)
+                if progress is not None:
+                    progress(len(done) / len(sources))
+
+            def encode_audio():
+                (
+                    ffmpeg.input(input_path)
+                    .audio
+                    .output(audio_path, **self.audio_options)
+                    .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+                )
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # The audio is the longest single task, so it starts first
+                futures = [executor.submit(encode_audio)] if has_audio else []
+                futures += [executor.submit(encode_segment, s, t) for s, t in zip(sources, encoded)]
+                for future in futures:
+                    future.result()
+
+            # Join the encoded segments and the audio track without re-encoding
+            list_path = os.path.join(work_dir, "segments.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in encoded:
+                    f.write(f"file '{os.path.abspath(path)}'\n")
+
+            streams = [ffmpeg.input(list_path, f='concat', safe=0).video]
+            if has_audio:
+                streams.append(ffmpeg.input(audio_path).audio)
+            (
+                ffmpeg.output(*streams, output_path, c='copy', movflags='+faststart')
+                .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            )
+            return output_path
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,213 @@
+# video_scraper_project/processing/stream_processor.py
+
+import os
+import threading
+import time
+from config import OUTPUT_FORMAT, STREAM_CHUNK_SIZE, STREAM_SAMPLE_FPS, TIMEOUT
+from processing.video_converter import (
+    COMPLIANT_VIDEO_CODECS, COMPLIANT_AUDIO_CODECS, VIDEO_ENCODE_OPTIONS, AUDIO_ENCODE_OPTIONS
+)
+from processing.watermark_removal import apply_delogo
+from utils.helpers import new_content_hasher
+from utils.lazy import lazy_import
+
+imagehash = lazy_import("imagehash")
+np = lazy_import("numpy")
+ffmpeg = lazy_import("ffmpeg")
+requests = lazy_import("requests")
+
+# yt-dlp codec names of streams that can be copied into the output
+STREAM_CODEC_NAMES = {'avc1': 'h264', 'h264': 'h264', 'mp4a': 'aac', 'aac': 'aac'}
+
+# Side of the grayscale thumbnails sampled for the perceptual hash
+SAMPLE_SIZE = 8
+
+
+class StreamError(Exception):
+    """Raised when a video cannot be processed as a stream"""
+    pass
+
+
+class StreamProcessor:
+    """Download, hash, sample and normalize a video in a single pass.
+
+    The media bytes are fed straight from the HTTP response into ffmpeg's
+    stdin while the content hash is updated from the same chunks. ffmpeg
+    writes the normalized video and, from the same decode, a trickle of tiny
+    grayscale frames for the perceptual hash. No raw file touches the disk:
+    the only disk I/O is writing the output once.
+
+    Streaming needs a single-file format with both audio and video and a
+    container that can be read front to back (most MP4s from video sites
+    are; an MP4 with its index at the end raises StreamError). Sites that
+    only serve HD as separate video and audio streams (YouTube above 360p)
+    have no such format at full quality; those videos raise StreamError
+    too, so the caller downloads them instead of silently losing quality.
+    """
+
+    def __init__(self, converter, deduplicator, request_client=None, key="default",
+                 chunk_size=STREAM_CHUNK_SIZE, sample_fps=STREAM_SAMPLE_FPS, threads=None):
+        self.converter = converter
+        self.deduplicator = deduplicator
+        self.request_client = request_client
+        self.key = key  # Rate limit bucket for the media requests
+        self.chunk_size = chunk_size
+        self.sample_fps = sample_fps
+        self.threads = threads
+        self.http = requests.Session()
+
+    def plan_from_info(self, info):
+        """Pick remux or transcode from the codecs yt-dlp reports, like VideoConverter.plan_video"""
+        width = info.get('width')
+        height = info.get('height')
+        if not width or not height or info.get('vcodec') in (None, 'none'):
+            raise StreamError("Format has no usable video stream information")
+
+        # The download path merges the best video stream, up to the output resolution
+        best_height = max(
+            (f.get('height') or 0 for f in info.get('formats') or [] if f.get('vcodec') not in (None, 'none')),
+            default=0
+        )
+        if self.converter.max_height:
+            best_height = min(best_height, self.converter.max_height)
+        if int(height) < best_height:
+            raise StreamError(f"Single-file format is {height}p, {best_height}p is only served as separate streams")
+
+        target_width, target_height = self.converter.target_size(int(width), int(height))
+        vcodec = STREAM_CODEC_NAMES.get((info.get('vcodec') or '').split('.')[0])
+        acodec = info.get('acodec')
+        has_audio = acodec not in (None, 'none')
+        audio_ok = not has_audio or STREAM_CODEC_NAMES.get(acodec.split('.')[0]) in COMPLIANT_AUDIO_CODECS
+
+        # Nothing is on disk to sample frames from, so only masks cached for the creator apply
+        remover = self.converter.watermark_remover
+        watermarks = remover.cached(self.key, info.get('uploader'), int(width), int(height)) if remover else []
+
+        # The pixel format is not reported; H.264 from video sites is 4:2:0 in practice
+        if (vcodec in COMPLIANT_VIDEO_CODECS and audio_ok and not watermarks
+                and (target_width, target_height) == (width, height)):
+            action = "remux"
+        else:
+            action = "transcode"
+
+        return {
+            'action': action,
+            'width': target_width,
+            'height': target_height,
+            'duration': float(info.get('duration') or 0),
+            'has_audio': has_audio,
+            'watermarks': watermarks,
+        }
+
+    def process(self, info, output_filename):
+        """Stream the format resolved in a yt-dlp info dict through ffmpeg.
+
+        Returns a dict with 'processed_path', 'video_hash',
+        'perceptual_hash', 'transcode_action' and 'transcode_seconds'.
+        """
+        if not info.get('url'):
+            raise StreamError("No single-file format to stream")
+        plan = self.plan_from_info(info)
+        output_path = os.path.join(self.converter.output_dir, f"{output_filename}.{OUTPUT_FORMAT}")
+
+        source = ffmpeg.input('pipe:0')
+        samples = (
+            source.video
+            .filter('fps', self.sample_fps)
+            .filter('scale', SAMPLE_SIZE, SAMPLE_SIZE, flags='area')
+            .filter('format', 'gray')
+            .output('pipe:1', format='rawvideo')
+        )
+        streams = [source.video]
+        if plan['has_audio']:
+            streams.append(source.audio)
+        if plan['action'] == "remux":
+            output = ffmpeg.output(*streams, output_path, c='copy', format=OUTPUT_FORMAT)
+        else:
+            streams[0] = apply_delogo(source.video, plan['watermarks']).filter('scale', plan['width'], plan['height'])
+            output = ffmpeg.output(
+                *streams,
+                output_path,
+                format=OUTPUT_FORMAT,
+                **VIDEO_ENCODE_OPTIONS,
+                **(AUDIO_ENCODE_OPTIONS if plan['has_audio'] else {}),
+                **({'threads': self.threads} if self.threads else {})
+            )
+
+        started_at = time.time()
+        response = self._open(info)
+        process = (
+            ffmpeg.merge_outputs(output, samples)
+            .global_args('-loglevel', 'error')
+            .run_async(overwrite_output=True, pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+        )
+
+        # ffmpeg's outputs are drained in the background so writing to its stdin never blocks on them
+        frames = []
+        stderr = []
+        readers = [
+            threading.Thread(target=lambda: frames.append(process.stdout.read()), daemon=True),
+            threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        hasher = new_content_hasher()
+        try:
+            with response:
+                for chunk in response.iter_content(self.chunk_size):
+                    hasher.update(chunk)
+                    process.stdin.write(chunk)
+        except (BrokenPipeError, requests.RequestException) as e:
+            process.kill()
+            error = e
+        else:
+            error = None
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            process.wait()
+            for reader in readers:
+                reader.join()
+
+        if error is not None or process.returncode != 0:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            message = b''.join(stderr).decode(errors='replace').strip()
+            raise StreamError(message or str(error) or f"ffmpeg exited with {process.returncode}")
+
+        return {
+            'processed_path': output_path,
+            'video_hash': hasher.hexdigest(),
+            'perceptual_hash': self._perceptual_hash(b''.join(frames)),
+            'transcode_action': plan['action'],
+            'transcode_seconds': time.time() - started_at,
+        }
+
+    def _open(self, info):
+        """Start the media download, through the rate limiter if there is one"""
+        def get():
+            response = self.http.get(info['url'], headers=info.get('http_headers'), stream=True, timeout=TIMEOUT)
+            response.raise_for_status()
+            return response
+
+        if self.request_client is None:
+            return get()
+        return self.request_client.call(self.key, get)
+
+    def _perceptual_hash(self, data):
+        """Pick evenly spaced sampled frames and combine them like VideoDeduplicator does"""
+        frame_size = SAMPLE_SIZE * SAMPLE_SIZE
+        count = len(data) // frame_size
+        if not count:
+            return None
+        num_samples = min(self.deduplicator.num_samples, count)
+        hashes = []
+        for i in range(num_samples):
+            index = int(count * (i + 0.5) / num_samples)
+            frame = np.frombuffer(data, dtype=np.uint8, count=frame_size, offset=index * frame_size)
+            frame = frame.reshape(SAMPLE_SIZE, SAMPLE_SIZE)
+            hashes.append(imagehash.ImageHash(frame > frame.mean()))
+        return self.deduplicator.combine_hashes(hashes)
@@ -0,0 +1,129 @@
+# video_scraper_project/processing/transcode_scheduler.py
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from config import TRANSCODE_MAX_JOBS, TRANSCODE_THREADS_PER_JOB
+
+# Relative cost per second of video, used to run the quickest jobs first
+ACTION_COST = {"none": 0.0, "remux": 0.01, "audio": 0.1, "transcode": 1.0}
+
+
+class TranscodeJob:
+    """A queued or running normalization, with its progress and timings"""
+
+    def __init__(self, input_path, output_filename, plan):
+        self.input_path = input_path
+        self.output_filename = output_filename
+        self.plan = plan
+        self.cost = ACTION_COST.get(plan['action'], 1.0) * (plan.get('duration') or 0)
+        self.status = "queued"  # queued, running, done or failed
+        self.progress = 0.0  # Fraction of the video encoded so far
+        self.output_path = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def wait_seconds(self):
+        """Time spent waiting for a free slot"""
+        return (self.started_at or time.time()) - self.queued_at
+
+    @property
+    def run_seconds(self):
+        """Time spent running ffmpeg"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def wait(self, timeout=None):
+        """Block until the job has finished and return its output path (None on failure)"""
+        self._done.wait(timeout)
+        return self.output_path
+
+
+class TranscodeScheduler:
+    """Run several ffmpeg normalizations in parallel.
+
+    Concurrency and per-job ffmpeg threads are sized to the available
+    cores: by default each job gets TRANSCODE_THREADS_PER_JOB threads and as
+    many jobs run at once as fit on the machine. Waiting jobs are started
+    cheapest first (short videos and remuxes before long encodes) so the
+    upload stage keeps getting work.
+    """
+
+    def __init__(self, converter, max_jobs=TRANSCODE_MAX_JOBS, threads_per_job=TRANSCODE_THREADS_PER_JOB,
+                 on_progress=None):
+        cpus = os.cpu_count() or 1
+        self.converter = converter
+        self.threads_per_job = max(1, min(threads_per_job, cpus))
+        self.max_jobs = max_jobs or max(1, cpus // self.threads_per_job)
+        self.on_progress = on_progress
+
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self.active_jobs = set()
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"transcode-{n}", daemon=True)
+            for n in range(self.max_jobs)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, input_path, output_filename, plan):
+        """Queue a video for normalization and return its TranscodeJob"""
+        job = TranscodeJob(input_path, output_filename, plan)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Transcode scheduler is closed")
+            heapq.heappush(self._queue, (job.cost, next(self._counter), job))
+            self._condition.notify()
+        return job
+
+    def close(self):
+        """Finish the queued jobs and stop the workers"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                self.active_jobs.add(job)
+
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.output_path = self.converter.normalize_video(
+                    job.input_path,
+                    job.output_filename,
+                    job.plan,
+                    threads=self.threads_per_job,
+                    progress=lambda fraction, job=job: self._report(job, fraction)
+                )
+            finally:
+                job.finished_at = time.time()
+                job.status = "done" if job.output_path else "failed"
+                if job.output_path:
+                    job.progress = 1.0
+                with self._condition:
+                    self.active_jobs.discard(job)
+                job._done.set()
+
+    def _report(self, job, fraction):
+        job.progress = fraction
+        if self.on_progress is not None:
+            self.on_progress(job)
@@ -1,61 +1,204 @@
 # video_scraper_project/processing/video_converter.py
 
 import os
-import ffmpeg
-from config import MAX_VIDEO_RESOLUTION, OUTPUT_FORMAT
+import shutil
+import threading
+from config import MAX_VIDEO_RESOLUTION, OUTPUT_FORMAT, SEGMENT_ENCODE_MIN_DURATION
+from processing.segment_encoder import SegmentEncoder
+from processing.watermark_removal import apply_delogo
+from utils.lazy import lazy_import
+
+ffmpeg = lazy_import("ffmpeg")
+
+# Streams that can go into the output without re-encoding
+COMPLIANT_VIDEO_CODECS = ("h264",)
+COMPLIANT_PIXEL_FORMATS = ("yuv420p", "yuvj420p")
+COMPLIANT_AUDIO_CODECS = ("aac",)
+
+# Encoder settings for a full transcode
+VIDEO_ENCODE_OPTIONS = {'vcodec': 'h264', 'video_bitrate': '5000k', 'pix_fmt': 'yuv420p'}
+AUDIO_ENCODE_OPTIONS = {'acodec': 'aac', 'audio_bitrate': '192k'}
 
 class VideoConverter:
-    def __init__(self, output_dir):
+    def __init__(self, output_dir, watermark_remover=None):
         self.output_dir = output_dir
+        self.watermark_remover = watermark_remover  # Finds overlays to remove during the encode
         os.makedirs(output_dir, exist_ok=True)
-    
-    def normalize_video(self, input_path, output_filename):
-        """Convert video to standard format and resolution"""
+        # "1080p" -> 1080, anything else means no height limit
+        self.max_height = int(MAX_VIDEO_RESOLUTION[:-1]) if MAX_VIDEO_RESOLUTION.endswith("p") else None
+
+    def target_size(self, width, height):
+        """Output dimensions for a video of the given size"""
+        # Never upscale: only shrink videos above the max resolution
+        if self.max_height and height > self.max_height:
+            target_height = self.max_height
+            target_width = int(width * (target_height / height))
+        else:
+            target_width = width
+            target_height = height
+        # Ensure dimensions are divisible by 2
+        return target_width - (target_width % 2), target_height - (target_height % 2)
+
+    def plan_video(self, input_path, source=None):
+        """Probe a video and pick the cheapest way to normalize it.
+
+        Returns None if the file has no video stream, otherwise a plan dict
+        whose 'action' is one of:
+
+        - "none": already H.264/AAC MP4 within the max resolution, used as is
+        - "remux": compliant streams in another container, copied into MP4
+        - "audio": compliant video, audio re-encoded to AAC
+        - "transcode": full re-encode, downscaled only above the max resolution
+
+        With a watermark remover and a (platform, creator) ``source``, the
+        plan's 'watermarks' lists overlay boxes to remove; a video with any
+        is always transcoded, the removal running in the same encode.
+        """
+        probe = ffmpeg.probe(input_path)
+        video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+        audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
+
+        if not video_stream:
+            return None
+
+        # Get current dimensions
+        width = int(video_stream['width'])
+        height = int(video_stream['height'])
+        target_width, target_height = self.target_size(width, height)
+
+        video_ok = (
+            video_stream.get('codec_name') in COMPLIANT_VIDEO_CODECS
+            and video_stream.get('pix_fmt') in COMPLIANT_PIXEL_FORMATS
+            and (target_width, target_height) == (width, height)
+        )
+        audio_ok = audio_stream is None or audio_stream.get('codec_name') in COMPLIANT_AUDIO_CODECS
+        container_ok = (
+            OUTPUT_FORMAT in probe['format'].get('format_name', '').split(',')
+            and os.path.splitext(input_path)[1].lower() == f".{OUTPUT_FORMAT}"
+        )
+
+        watermarks = []
+        if self.watermark_remover is not None and source is not None:
+            watermarks = self.watermark_remover.find(
+                input_path, source[0], source[1], width, height, float(probe['format'].get('duration') or 0)
+            )
+
+        if not video_ok or watermarks:
+            action = "transcode"
+        elif not audio_ok:
+            action = "audio"
+        elif not container_ok:
+            action = "remux"
+        else:
+            action = "none"
+
+        return {
+            'action': action,
+            'width': target_width,
+            'height': target_height,
+            'duration': float(probe['format'].get('duration') or 0),
+            'has_audio': audio_stream is not None,
+            'watermarks': watermarks,
+        }
+
+    def normalize_video(self, input_path, output_filename, plan=None, threads=None, progress=None):
+        """Convert video to standard format and resolution.
+
+        ``threads`` caps the encoder threads of this ffmpeg run and
+        ``progress`` is called with the fraction of the video processed.
+        """
         output_path = os.path.join(self.output_dir, f"{output_filename}.{OUTPUT_FORMAT}")
-        
+
         try:
-            # Probe input file
-            probe = ffmpeg.probe(input_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            
-            if not video_stream:
+            if plan is None:
+                plan = self.plan_video(input_path)
+            if not plan:
                 return None
-            
-            # Get current dimensions
-            width = int(video_stream['width'])
-            height = int(video_stream['height'])
-            
-            # Calculate scaling dimensions while maintaining aspect ratio
-            if MAX_VIDEO_RESOLUTION == "1080p":
-                target_height = 1080
-                target_width = int(width * (target_height / height))
-            else:
-                # Default to original dimensions
-                target_width = width
-                target_height = height
-            # Ensure dimensions are divisible by 2
-            target_width = target_width - (target_width % 2)
-            target_height = target_height - (target_height % 2)    
-            
+
+            if plan['action'] == "none":
+                # Already compliant: link (or copy) into the output directory
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                try:
+                    os.link(input_path, output_path)
+                except OSError:
+                    shutil.copyfile(input_path, output_path)
+                return output_path
+
             # Build ffmpeg command
             stream = ffmpeg.input(input_path)
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                vcodec='h264',
-                acodec='aac',
-                video_bitrate='5000k',
-                audio_bitrate='192k',
-                s=f"{target_width}x{target_height}",
-                format=OUTPUT_FORMAT
-            )
-            
-            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            if plan['action'] == "remux":
+                # Only the main video and audio tracks; data and subtitle streams may not fit the container
+                stream = ffmpeg.output(stream['v:0'], stream['a:0?'], output_path, c='copy', format=OUTPUT_FORMAT)
+            elif plan['action'] == "audio":
+                stream = ffmpeg.output(
+                    stream['v:0'],
+                    stream['a:0?'],
+                    output_path,
+                    vcodec='copy',
+                    format=OUTPUT_FORMAT,
+                    **AUDIO_ENCODE_OPTIONS
+                )
+            elif SEGMENT_ENCODE_MIN_DURATION and plan['duration'] >= SEGMENT_ENCODE_MIN_DURATION:
+                # Long video: encode keyframe-aligned segments in parallel
+                encoder = SegmentEncoder(VIDEO_ENCODE_OPTIONS, AUDIO_ENCODE_OPTIONS, threads=threads)
+                return encoder.encode(
+                    input_path,
+                    output_path,
+                    plan['width'],
+                    plan['height'],
+                    has_audio=plan.get('has_audio', True),
+                    watermarks=plan.get('watermarks'),
+                    progress=progress
+                )
+            else:
+                streams = [stream]
+                if plan.get('watermarks'):
+                    # Overlays are removed in the same filter graph, before the output scaling
+                    streams = [apply_delogo(stream.video, plan['watermarks'])]
+                    if plan.get('has_audio', True):
+                        streams.append(stream.audio)
+                stream = ffmpeg.output(
+                    *streams,
+                    output_path,
+                    s=f"{plan['width']}x{plan['height']}",
+                    format=OUTPUT_FORMAT,
+                    **VIDEO_ENCODE_OPTIONS,
+                    **AUDIO_ENCODE_OPTIONS,
+                    **({'threads': threads} if threads else {})
+                )
+
+            self._run(stream, plan.get('duration'), progress)
             return output_path
-            
+
         except ffmpeg.Error as e:
             print(f"FFmpeg error: {e.stderr.decode()}")
             return None
         except Exception as e:
             print(f"Error normalizing video: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _run(self, stream, duration=None, progress=None):
+        """Run an ffmpeg command, reporting progress from its -progress output"""
+        if progress is None or not duration:
+            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            return
+
+        stream = stream.global_args('-progress', 'pipe:1', '-nostats')
+        process = ffmpeg.run_async(stream, overwrite_output=True, pipe_stdout=True, pipe_stderr=True)
+
+        # Drain stderr in the background so a chatty ffmpeg cannot block on a full pipe
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+        reader.start()
+
+        for line in process.stdout:
+            key, _, value = line.decode(errors='replace').strip().partition('=')
+            # out_time_ms is in microseconds as well (long-standing ffmpeg quirk)
+            if key in ('out_time_us', 'out_time_ms') and value.isdigit():
+                progress(min(1.0, int(value) / 1e6 / duration))
+
+        process.wait()
+        reader.join()
+        if process.returncode != 0:
+            raise ffmpeg.Error('ffmpeg', None, b''.join(stderr))
@@ -1,15 +1,91 @@
 # video_scraper_project/processing/video_deduplicator.py
 
 import os
-import imagehash
-from PIL import Image
-import cv2
-import numpy as np
+from config import (
+    DEDUP_SAMPLING, DEDUP_NUM_SAMPLES, AUDIO_FINGERPRINT, AUDIO_CANDIDATE_SCORE, AUDIO_DUPLICATE_SCORE,
+    AUDIO_PREFILTER
+)
+from processing.audio_fingerprint import AudioFingerprinter, AudioIndex
+from processing.hash_index import HashIndex
+from utils.lazy import lazy_import
+
+imagehash = lazy_import("imagehash")
+Image = lazy_import("PIL.Image")
+cv2 = lazy_import("cv2")
+ffmpeg = lazy_import("ffmpeg")
+np = lazy_import("numpy")
 
 class VideoDeduplicator:
-    def __init__(self, threshold=5):
+    def __init__(self, threshold=5, index_path=None, sampling=DEDUP_SAMPLING, num_samples=DEDUP_NUM_SAMPLES,
+                 audio_index_path=None, use_audio=AUDIO_FINGERPRINT, frame_source=None):
         self.threshold = threshold
-        self.known_hashes = {}
+        self.sampling = sampling  # "keyframe" or "seek" (frame-accurate OpenCV seeks)
+        self.num_samples = num_samples
+        # Known hashes, persisted across runs when index_path is given
+        self.known_hashes = HashIndex(index_path, threshold)
+        # Soundtrack fingerprints of known videos, checked before any frame is decoded
+        self.fingerprinter = AudioFingerprinter() if use_audio else None
+        self.audio_index = AudioIndex(audio_index_path) if use_audio else None
+        # Maps the key of a known video to a file its frames can still be read from (the raw cache), or None
+        self.frame_source = frame_source
+    
+    def get_duration(self, video_path):
+        """Return the video duration in seconds from the container, or None"""
+        try:
+            probe = ffmpeg.probe(video_path)
+        except ffmpeg.Error:
+            return None
+        
+        duration = probe.get('format', {}).get('duration')
+        if duration is None:
+            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), {})
+            duration = video_stream.get('duration')
+        return float(duration) if duration else None
+    
+    def extract_keyframes(self, video_path, num_samples=3, size=8):
+        """Extract one keyframe per equal-length segment as size x size grayscale arrays.
+        
+        Samples are placed by timestamp from the container duration instead
+        of the frame count, which is often wrong for variable frame rate
+        clips. A single ffmpeg call seeks to each timestamp, decodes only the
+        nearest keyframe and scales it to hash size straight after decoding.
+        """
+        duration = self.get_duration(video_path)
+        if not duration:
+            return []
+        
+        streams = []
+        for i in range(num_samples):
+            timestamp = duration * (i + 0.5) / num_samples
+            stream = ffmpeg.input(video_path, ss=f"{timestamp:.3f}", skip_frame='nokey', noaccurate_seek=None)
+            streams.append(
+                stream.video
+                .trim(end_frame=1)
+                .filter('scale', size, size, flags='area')
+                .filter('format', 'gray')
+            )
+        
+        try:
+            out, _ = (
+                ffmpeg.concat(*streams, v=1, a=0)
+                .output('pipe:', format='rawvideo', vsync='passthrough')
+                .global_args('-loglevel', 'error')
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error as e:
+            print(f"FFmpeg error: {e.stderr.decode()}")
+            return []
+        
+        frame_size = size * size
+        return [
+            np.frombuffer(out, dtype=np.uint8, count=frame_size, offset=i * frame_size).reshape(size, size)
+            for i in range(len(out) // frame_size)
+        ]
+    
+    def calculate_temporal_signature(self, video_path, num_samples=None):
+        """Calculate one average hash per segment of the video, in playback order"""
+        frames = self.extract_keyframes(video_path, num_samples or self.num_samples)
+        return [imagehash.ImageHash(frame > frame.mean()) for frame in frames]
     
     def extract_video_frames(self, video_path, num_frames=3):
         """Extract representative frames from video"""
@@ -53,12 +129,21 @@ class VideoDeduplicator:
 
     def calculate_video_hash(self, video_path):
         """Calculate perceptual hash for a video"""
-        frames = self.extract_video_frames(video_path)
-        if not frames:
-            return None
+        hashes = []
+        if self.sampling == "keyframe":
+            hashes = self.calculate_temporal_signature(video_path)
         
-        # Calculate average hash of all frames
-        hashes = [imagehash.average_hash(frame) for frame in frames]
+        if not hashes:
+            frames = self.extract_video_frames(video_path, self.num_samples)
+            if not frames:
+                return None
+            
+            # Calculate average hash of all frames
+            hashes = [imagehash.average_hash(frame) for frame in frames]
+        return self.combine_hashes(hashes)
+    
+    def combine_hashes(self, hashes):
+        """Combine per-frame hashes into one video hash by majority vote per bit"""
         if not hashes:
             return None
         
@@ -67,19 +152,94 @@ class VideoDeduplicator:
         avg_hash = np.round(hash_arrays.mean(axis=0)).astype(bool)
         
         return imagehash.ImageHash(avg_hash)
-
     
-    def is_duplicate(self, video_path):
-        """Check if video is a duplicate of any known video"""
-        video_hash = self.calculate_video_hash(video_path)
-        if video_hash is None:
+    def audio_match(self, fingerprint, key=None):
+        """Return (key, score) of a known video whose soundtrack lines up with this one, or None"""
+        if fingerprint is None or self.audio_index is None:
+            return None
+        match = self.audio_index.match(fingerprint, exclude=key)
+        if match and match[1] >= AUDIO_CANDIDATE_SCORE:
+            return match
+        return None
+    
+    def needs_frames(self, fingerprint, audio_match):
+        """Whether frame hashes are needed to decide, given the soundtrack match"""
+        if fingerprint is None or not AUDIO_PREFILTER:
+            return True
+        # A soundtrack that lines up with nothing is no re-upload, and one that
+        # largely lines up is a re-upload whatever the frames show
+        return audio_match is not None and audio_match[1] < AUDIO_DUPLICATE_SCORE
+    
+    def calculate_hashes(self, video_path, key=None):
+        """Return (video_hash, audio_fingerprint) for a video, decoding frames only when needed.
+        
+        The soundtrack is fingerprinted first; frames are only hashed when
+        the video has no audio or its soundtrack partly lines up with a
+        known video.
+        """
+        fingerprint = self.fingerprinter.fingerprint_file(video_path) if self.fingerprinter else None
+        if not self.needs_frames(fingerprint, self.audio_match(fingerprint, key)):
+            return None, fingerprint
+        return self.calculate_video_hash(video_path), fingerprint
+    
+    def is_duplicate(self, video_path, video_hash=None, key=None, audio_fingerprint=None):
+        """Check if video is a duplicate of any known video.
+        
+        Known videos are identified by ``key`` (defaults to the file path);
+        the key of the matching video is returned for duplicates. With audio
+        fingerprints, a video whose soundtrack largely lines up with a known
+        video is a duplicate without hashing its frames, even if they were
+        cropped, mirrored or re-framed, and one that lines up with nothing is
+        accepted without hashing them either. Only a partial soundtrack match
+        is decided by frames; the matched video was possibly kept without a
+        frame hash, so it is hashed then if ``frame_source`` still has it.
+        """
+        key = key or video_path
+        fingerprint = None
+        if self.fingerprinter is not None:
+            fingerprint = audio_fingerprint
+            if fingerprint is None:
+                fingerprint = self.fingerprinter.fingerprint_file(video_path)
+        # Checked again here: a matching video may have been added since the hash stage looked
+        audio_match = self.audio_match(fingerprint, key)
+        if audio_match and audio_match[1] >= AUDIO_DUPLICATE_SCORE:
+            return True, audio_match[0]
+        
+        if video_hash is None and self.needs_frames(fingerprint, audio_match):
+            video_hash = self.calculate_video_hash(video_path)
+        if video_hash is None and fingerprint is None:
             return False, None
         
-        # Compare with known hashes
-        for known_path, known_hash in self.known_hashes.items():
-            if video_hash - known_hash <= self.threshold:
-                return True, known_path
+        if video_hash is not None and audio_match is not None:
+            self.index_known_video(audio_match[0])
         
-        # Add to known hashes if not a duplicate
-        self.known_hashes[video_path] = video_hash
-        return False, None
\ No newline at end of file
+        # Compare with known hashes; frames of a video whose soundtrack lines up with nothing
+        # (hashed when the prefilter is off) are only indexed for later videos
+        compare_frames = fingerprint is None or not AUDIO_PREFILTER or audio_match is not None
+        if video_hash is not None and compare_frames:
+            # Checked and added in one step against the hashes other workers stored meanwhile;
+            # a reprocessed video is already known under its own key
+            match = self.known_hashes.add_if_new(key, video_hash)
+            if match:
+                return True, match[0]
+        elif video_hash is not None:
+            self.known_hashes.add(key, video_hash)
+        
+        # Not a duplicate
+        if fingerprint is not None:
+            self.audio_index.add(key, fingerprint)
+        return False, None
+    
+    def index_known_video(self, key):
+        """Hash and index the frames of a known video kept without a frame hash, if its file is still available"""
+        if key in self.known_hashes or self.frame_source is None:
+            return
+        video_path = self.frame_source(key)
+        video_hash = self.calculate_video_hash(video_path) if video_path else None
+        if video_hash is not None:
+            self.known_hashes.add(key, video_hash)
+    
+    def close(self):
+        self.known_hashes.close()
+        if self.audio_index is not None:
+            self.audio_index.close()
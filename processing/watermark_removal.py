@@ -0,0 +1,212 @@
+# video_scraper_project/processing/watermark_removal.py
+
+import json
+import os
+import threading
+from config import (
+    WATERMARK_SAMPLE_FRAMES, WATERMARK_ANALYSIS_WIDTH, WATERMARK_MAX_AREA, WATERMARK_CACHE_FILE,
+    WATERMARK_CACHE_MAX_USES
+)
+from utils.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+ffmpeg = lazy_import("ffmpeg")
+np = lazy_import("numpy")
+
+# Gray levels: a pixel is on an edge above this gradient, and static below this temporal deviation
+EDGE_THRESHOLD = 40
+STATIC_STD = 20
+# Fraction of sampled frames a pixel must be an edge in to belong to an overlay
+EDGE_PERSISTENCE = 0.85
+# Median temporal deviation below which the whole scene is too static to tell overlays apart
+MIN_SCENE_STD = 8
+# Overlay boxes smaller than this fraction of the frame are noise
+MIN_BOX_AREA = 0.0005
+
+
+class WatermarkDetector:
+    """Find static overlays (platform logos, creator handles) in a video.
+
+    A handful of keyframes spread over the video are decoded at a small
+    size in one ffmpeg call. Overlays are the pixels that are on a strong
+    edge in nearly every sample while barely changing, as opposed to the
+    moving content underneath. The result is a list of boxes as fractions
+    of the frame, so a mask found on one video applies to others of any
+    resolution.
+    """
+
+    def __init__(self, num_samples=WATERMARK_SAMPLE_FRAMES, analysis_width=WATERMARK_ANALYSIS_WIDTH,
+                 max_area=WATERMARK_MAX_AREA):
+        self.num_samples = num_samples
+        self.analysis_width = analysis_width
+        self.max_area = max_area
+
+    def sample_frames(self, video_path, width, height, duration):
+        """Decode evenly spaced keyframes as an (N, h, w) grayscale array"""
+        analysis_height = max(2, int(height * self.analysis_width / width) // 2 * 2)
+        streams = []
+        for i in range(self.num_samples):
+            timestamp = duration * (i + 0.5) / self.num_samples
+            stream = ffmpeg.input(video_path, ss=f"{timestamp:.3f}", skip_frame='nokey', noaccurate_seek=None)
+            streams.append(
+                stream.video
+                .trim(end_frame=1)
+                .filter('scale', self.analysis_width, analysis_height, flags='area')
+                .filter('format', 'gray')
+            )
+
+        out, _ = (
+            ffmpeg.concat(*streams, v=1, a=0)
+            .output('pipe:', format='rawvideo', vsync='passthrough')
+            .global_args('-loglevel', 'error')
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        frame_size = self.analysis_width * analysis_height
+        count = len(out) // frame_size
+        return np.frombuffer(out, dtype=np.uint8, count=count * frame_size).reshape(
+            count, analysis_height, self.analysis_width
+        )
+
+    def detect(self, video_path, width, height, duration):
+        """Return the overlay boxes of a video as (x, y, w, h) fractions, [] if it has none"""
+        if not duration:
+            return []
+        try:
+            frames = self.sample_frames(video_path, width, height, duration)
+        except ffmpeg.Error as e:
+            print(f"FFmpeg error: {e.stderr.decode()}")
+            return []
+        return self.find_overlays(frames)
+
+    def find_overlays(self, frames):
+        """Boxes of the static, edge-rich regions of a stack of grayscale frames"""
+        if len(frames) < 3:
+            return []
+        frames = frames.astype(np.float32)
+        deviation = frames.std(axis=0)
+        if np.median(deviation) < MIN_SCENE_STD:
+            # Slideshows and static shots: everything looks like an overlay
+            return []
+
+        # Gradient magnitude of every sample at once
+        gradient = np.zeros_like(frames)
+        gradient[:, :, 1:-1] += np.abs(frames[:, :, 2:] - frames[:, :, :-2])
+        gradient[:, 1:-1, :] += np.abs(frames[:, 2:, :] - frames[:, :-2, :])
+        persistence = (gradient > EDGE_THRESHOLD).mean(axis=0)
+
+        mask = ((persistence >= EDGE_PERSISTENCE) & (deviation < STATIC_STD)).astype(np.uint8)
+        frame_height, frame_width = mask.shape
+        if mask.mean() > self.max_area:
+            return []
+
+        # Merge the strokes of a logo or the letters of a handle into one region
+        size = max(3, frame_width // 40) | 1
+        mask = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+
+        boxes = []
+        for x, y, w, h, _ in stats[1:count]:
+            if w * h < MIN_BOX_AREA * frame_width * frame_height:
+                continue
+            boxes.append((
+                float(x / frame_width), float(y / frame_height), float(w / frame_width), float(h / frame_height)
+            ))
+        if sum(w * h for _, _, w, h in boxes) > self.max_area:
+            return []
+        return boxes
+
+
+class WatermarkMaskCache:
+    """Overlay boxes per platform, creator and aspect ratio, persisted between runs.
+
+    Creators stamp every upload of a given shape the same way, so a mask is
+    detected once and reused until it has served ``max_uses`` videos. Boxes
+    are fractions of the frame, so a vertical and a landscape upload of the
+    same creator each get their own mask.
+    """
+
+    def __init__(self, path=WATERMARK_CACHE_FILE, max_uses=WATERMARK_CACHE_MAX_USES):
+        self.path = path
+        self.max_uses = max_uses
+        self.lock = threading.Lock()
+        self.masks = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.masks = json.load(f)
+
+    @staticmethod
+    def key(platform, creator, width, height):
+        return f"{platform}/{creator}/{width / max(1, height):.2f}"
+
+    def get(self, platform, creator, width, height):
+        """Return the cached boxes and count one more use, or None when missing or worn out"""
+        with self.lock:
+            entry = self.masks.get(self.key(platform, creator, width, height))
+            if entry is None or entry['uses'] >= self.max_uses:
+                return None
+            entry['uses'] += 1
+            return [tuple(box) for box in entry['boxes']]
+
+    def peek(self, platform, creator, width, height):
+        """Return the cached boxes without counting a use, or None"""
+        with self.lock:
+            entry = self.masks.get(self.key(platform, creator, width, height))
+            return [tuple(box) for box in entry['boxes']] if entry else None
+
+    def set(self, platform, creator, width, height, boxes):
+        with self.lock:
+            self.masks[self.key(platform, creator, width, height)] = {'boxes': [list(box) for box in boxes], 'uses': 0}
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.masks, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class WatermarkRemover:
+    """Decide which regions of a video the normalization encode should clean up"""
+
+    def __init__(self, detector=None, cache=None):
+        self.detector = detector or WatermarkDetector()
+        self.cache = cache or WatermarkMaskCache()
+
+    def find(self, video_path, platform, creator, width, height, duration):
+        """Return the overlay boxes of a video in pixels, from the cache or by detection"""
+        if not creator:
+            # Nothing to share the mask with
+            return to_pixels(self.detector.detect(video_path, width, height, duration), width, height)
+        boxes = self.cache.get(platform, creator, width, height)
+        if boxes is None:
+            boxes = self.detector.detect(video_path, width, height, duration)
+            self.cache.set(platform, creator, width, height, boxes)
+        return to_pixels(boxes, width, height)
+
+    def cached(self, platform, creator, width, height):
+        """Return the cached overlay boxes in pixels without detecting (for streamed videos)"""
+        if not creator:
+            return []
+        return to_pixels(self.cache.peek(platform, creator, width, height) or [], width, height)
+
+
+def to_pixels(boxes, width, height):
+    """Turn fractional boxes into pixel boxes that delogo accepts (strictly inside the frame)"""
+    pixel_boxes = []
+    for bx, by, bw, bh in boxes:
+        x = min(max(1, int(bx * width)), width - 3)
+        y = min(max(1, int(by * height)), height - 3)
+        w = max(2, min(int(round(bw * width)), width - 1 - x))
+        h = max(2, min(int(round(bh * height)), height - 1 - y))
+        pixel_boxes.append((x, y, w, h))
+    return pixel_boxes
+
+
+def apply_delogo(video, boxes):
+    """Add a delogo filter per box to an ffmpeg-python video stream"""
+    for x, y, w, h in boxes or []:
+        video = video.filter('delogo', x=x, y=y, w=w, h=h)
+    return video
@@ -1,91 +1,690 @@
 # video_scraper_project/run.py
 
+import argparse
 import os
-import time
-from datetime import datetime
-from config import PLATFORMS, BRAND_NAME
-from scraper.youtube_scraper import YouTubeScraper
+import socket
+from functools import partial
+from config import (
+    PLATFORMS, BRAND_NAME, PIPELINE_QUEUE_SIZE, PIPELINE_WORKERS, DEDUP_THRESHOLD, HASH_INDEX_DB,
+    YOUTUBE_SEARCH_BUDGET, PLATFORM_SEARCH_BUDGET, YOUTUBE_METADATA_SOURCE, STREAMING_MODE, TRACE_FILE, WORK_BATCH_SIZE,
+    WATERMARK_REMOVAL, AUDIO_INDEX_DB, RAW_CACHE
+)
+from scraper.registry import create_scrapers, discover
 from processing.video_deduplicator import VideoDeduplicator
+from processing.hash_index import HashIndex
+from processing.hash_batch import pack_hashes, find_duplicate_pairs, group_duplicates
 from processing.video_converter import VideoConverter
+from processing.transcode_scheduler import TranscodeScheduler
+from processing.stream_processor import StreamProcessor
+from processing.watermark_removal import WatermarkRemover
 from uploader.drive_uploader import DriveUploader
 from uploader.metadata_logger import MetadataLogger
 from utils.helpers import setup_logger
+from utils.lazy import lazy_import
+from utils.metrics import MetricsRegistry, MetricsExporter
+from utils.pipeline import PipelineRunner, Resume, Stage
+from utils.raw_cache import RawCache
+from utils.validators import filter_video_metadata
+from utils.video_index import VideoIndex
+from utils.work_queue import WorkQueue, FINAL_STATUSES as WORK_FINAL_STATUSES, platform_for_url
 
-def main():
-    # Setup logging
-    logger = setup_logger('main', './logs/main.log')
-    
-    # Initialize components
-    deduplicator = VideoDeduplicator()
-    converter = VideoConverter('./data/videos/processed')
-    drive_uploader = DriveUploader()
+imagehash = lazy_import("imagehash")
+
+# Stage names in pipeline order, for resuming checkpointed videos
+STAGES = ["extract", "download", "hash", "dedup", "transcode", "upload"]
+STREAMING_STAGES = ["extract", "stream", "dedup", "upload"]
+
+# Working file a stage needs from the checkpoint it resumes after
+RESUME_REQUIRES = {
+    'hash': 'file_path',
+    'dedup': 'file_path',
+    'transcode': 'file_path',
+    'upload': 'processed_path',
+}
+
+
+# Deduplicator of a hash worker process, opened once by init_hash_worker
+_worker_deduplicator = None
+
+
+def init_hash_worker():
+    """Open the deduplicator a hash worker process reuses for every video"""
+    global _worker_deduplicator
+    _worker_deduplicator = VideoDeduplicator(audio_index_path=AUDIO_INDEX_DB)
+
+
+def hash_video(video_metadata, deduplicator=None):
+    """Fingerprint a downloaded video's soundtrack and, if needed, hash its frames.
+
+    Runs in a hash worker process with its own deduplicator, unless the
+    caller passes one.
+    """
+    if deduplicator is None:
+        if _worker_deduplicator is None:
+            init_hash_worker()
+        deduplicator = _worker_deduplicator
+    video_metadata['perceptual_hash'], video_metadata['audio_fingerprint'] = deduplicator.calculate_hashes(
+        video_metadata['file_path'], key=video_metadata['source_url']
+    )
+    return video_metadata
+
+
+def transcode_video(scheduler, video_metadata):
+    """Normalize a downloaded video through the transcode scheduler and wait for it"""
+    output_filename = f"{video_metadata['platform']}_{os.path.basename(video_metadata['file_path']).split('.')[0]}"
+    plan = scheduler.converter.plan_video(
+        video_metadata['file_path'], source=(video_metadata['platform'], video_metadata.get('creator'))
+    )
+    if not plan:
+        raise RuntimeError(f"No video stream found: {video_metadata['file_path']}")
+
+    job = scheduler.submit(video_metadata['file_path'], output_filename, plan)
+    processed_path = job.wait()
+    if not processed_path:
+        raise RuntimeError(f"Failed to normalize video: {video_metadata['file_path']}")
+
+    video_metadata['processed_path'] = processed_path
+    video_metadata['transcode_action'] = plan['action']
+    video_metadata['transcode_seconds'] = job.run_seconds
+    return video_metadata
+
+
+def file_size(key):
+    """Stage size function: bytes of the file a video_metadata key points to"""
+    return lambda video_metadata: os.path.getsize(video_metadata[key])
+
+
+def remove_file(path):
+    """Delete a working file if it is still on disk"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def dedup_archive(logger):
+    """Find every group of near-duplicates among all indexed videos"""
+    index = HashIndex(HASH_INDEX_DB, DEDUP_THRESHOLD)
+    keys, hashes = zip(*index.items()) if len(index) else ((), ())
+    index.close()
+
+    logger.info(f"Comparing all pairs of {len(keys)} indexed videos")
+    pairs_i, pairs_j, _ = find_duplicate_pairs(pack_hashes(hashes), DEDUP_THRESHOLD)
+    groups = group_duplicates(len(keys), pairs_i, pairs_j)
+
+    for group in groups:
+        logger.info(f"Duplicate group: {', '.join(keys[row] for row in group)}")
+    logger.info(f"Found {len(pairs_i)} duplicate pairs in {len(groups)} groups")
+
+
+def report(logger, csv_path=None):
+    """Log how many videos were kept and skipped per platform, optionally exporting the log as CSV"""
     metadata_logger = MetadataLogger()
-    
-    # Initialize scrapers (example with YouTube)
-    # In a real implementation, you would initialize all platform scrapers
-    youtube_api_key = os.getenv('YOUTUBE_API_KEY')
-    if not youtube_api_key:
-        logger.error("YouTube API key not found")
-        return
-    
-    youtube_scraper = YouTubeScraper(youtube_api_key)
-    
-    # Search for videos
-    logger.info(f"Searching for videos related to {BRAND_NAME}")
-    video_urls = youtube_scraper.search_videos(BRAND_NAME, max_results=20)
-    logger.info(f"Found {len(video_urls)} potential videos")
-    
-    # Process each video
-    for i, video_url in enumerate(video_urls):
-        logger.info(f"Processing video {i+1}/{len(video_urls)}: {video_url}")
-        
+    for (platform, dedup_status), count in sorted(metadata_logger.count_by_status().items()):
+        logger.info(f"{platform}: {count} {dedup_status}")
+    if csv_path:
+        metadata_logger.export_csv(csv_path)
+        logger.info(f"Exported metadata log to {csv_path}")
+    metadata_logger.close()
+
+
+class PipelineContext:
+    """Components shared by the stages of a run, opened once per process"""
+
+    def __init__(self, scrapers):
+        self.scrapers = scrapers  # platform -> scraper
+        self.raw_cache = RawCache() if RAW_CACHE else None
+        self.deduplicator = VideoDeduplicator(
+            DEDUP_THRESHOLD, HASH_INDEX_DB, audio_index_path=AUDIO_INDEX_DB,
+            frame_source=self.cached_video_path if self.raw_cache is not None else None
+        )
+        self.converter = VideoConverter(
+            './data/videos/processed', WatermarkRemover() if WATERMARK_REMOVAL else None
+        )
+        self.scheduler = TranscodeScheduler(self.converter)
+        self.drive_uploader = DriveUploader()
+        self.metadata_logger = MetadataLogger()
+        self.video_index = VideoIndex()
+        self.prefetched = {}  # video URL -> metadata fetched ahead of the extract stage
+        self.stream_processors = {}
+        if STREAMING_MODE:
+            self.stream_processors = {
+                platform: StreamProcessor(
+                    self.converter, self.deduplicator, scraper.requests, platform,
+                    threads=self.scheduler.threads_per_job
+                )
+                for platform, scraper in scrapers.items()
+            }
+
+    def scraper_for(self, video_url):
+        """The scraper of the platform a video URL belongs to"""
+        platform = platform_for_url(video_url)
+        if platform not in self.scrapers:
+            raise ValueError(f"No scraper configured for {platform or 'unknown platform'}: {video_url}")
+        return self.scrapers[platform]
+
+    def cached_video_path(self, video_url):
+        """Raw download of a video still in the raw cache, or None"""
+        platform = platform_for_url(video_url)
+        if platform not in self.scrapers:
+            return None
+        entry = self.raw_cache.get(platform, self.scrapers[platform].get_video_id(video_url))
+        return entry['path'] if entry else None
+
+    def prefetch(self, video_urls):
+        """Fetch metadata for many videos at once when the metadata source allows it"""
+        # One videos().list call per 50 videos instead of a yt-dlp page scrape per video
+        youtube_urls = [url for url in video_urls if platform_for_url(url) == "youtube"]
+        if YOUTUBE_METADATA_SOURCE == "api" and youtube_urls and "youtube" in self.scrapers:
+            # Videos the API did not return (or whose batch failed) are left to yt-dlp in extract
+            self.prefetched.update(
+                (url, metadata)
+                for url, metadata in zip(youtube_urls, self.scrapers["youtube"].fetch_metadata(youtube_urls))
+                if metadata is not None
+            )
+
+    def close(self):
+        self.scheduler.close()
+        self.video_index.close()
+        self.deduplicator.close()
+        self.metadata_logger.close()
+        if self.raw_cache is not None:
+            self.raw_cache.close()
+
+
+def stage_names():
+    """Names of the pipeline stages in the current mode, in order"""
+    return STREAMING_STAGES if STREAMING_MODE else STAGES
+
+
+def run_videos(logger, context, items, total=None, on_result=None, on_stage=None, keep_results=True,
+               streaming=STREAMING_MODE):
+    """Run video URLs (or Resume entries for checkpointed videos) through the pipeline"""
+    deduplicator = context.deduplicator
+    scheduler = context.scheduler
+    drive_uploader = context.drive_uploader
+    metadata_logger = context.metadata_logger
+    video_index = context.video_index
+    prefetched = context.prefetched
+    raw_cache = context.raw_cache
+    video_urls = []
+
+    def entries():
+        # Items may be claimed lazily, so URLs are collected as the pipeline takes them
+        for item in items:
+            video_urls.append(item.item['source_url'] if isinstance(item, Resume) else item)
+            yield item
+
+    def extract(video_url):
+        # Extract metadata and check relevance before downloading
+        scraper = context.scraper_for(video_url)
+        platform = scraper.platform_name
+        video_id = scraper.get_video_id(video_url)
+        if video_url in prefetched:
+            metadata = prefetched.pop(video_url)
+        else:
+            metadata = scraper.extract_metadata(video_url)
+        if not metadata:
+            logger.info(f"Failed to extract metadata: {video_url}")
+            video_index.mark(platform, video_id, "failed", source_url=video_url)
+            return None
+        if not filter_video_metadata(metadata):
+            logger.info(f"Video not brand-related: {video_url}")
+            video_index.mark(platform, video_id, "rejected", source_url=video_url)
+            return None
+        return metadata
+
+    def accept_download(video_url, video_id, video_metadata):
+        platform = video_metadata['platform']
+        video_metadata['video_id'] = video_id
+
+        # Byte-identical re-posts are dropped before perceptual dedup and transcode
+        original = video_index.find_by_content_hash(video_metadata.get('video_hash'), platform, video_id)
+        if original:
+            logger.info(f"Exact duplicate of {original[0]} video {original[1]}, skipping: {video_url}")
+            metadata_logger.log_metadata(video_metadata, None, "duplicate")
+            video_index.mark(platform, video_id, "duplicate", video_metadata.get('video_hash'), video_url)
+            os.remove(video_metadata['file_path'])
+            return None
+
+        video_index.mark(platform, video_id, "downloaded", video_metadata.get('video_hash'), video_url)
+        return video_metadata
+
+    def download(metadata):
+        video_url = metadata['source_url']
+        scraper = context.scraper_for(video_url)
+        platform = scraper.platform_name
+        video_id = scraper.get_video_id(video_url)
+        cached = raw_cache.checkout(platform, video_id, scraper.download_dir) if raw_cache else None
+        if cached:
+            logger.info(f"Using cached download: {video_url}")
+            metadata.pop('info', None)
+            metadata.update({'file_path': cached['path'], 'video_hash': cached['content_hash'], 'platform': platform})
+            return accept_download(video_url, video_id, metadata)
+
+        video_metadata = scraper.process_video(video_url, metadata)
+        if not video_metadata:
+            logger.info(f"Failed to download video: {video_url}")
+            video_index.mark(platform, video_id, "failed", source_url=video_url)
+            return None
+        if raw_cache and video_metadata.get('video_hash'):
+            raw_cache.put(
+                platform, video_id, video_metadata['file_path'], video_metadata['video_hash'],
+                checkpoint_state(video_metadata)
+            )
+        return accept_download(video_url, video_id, video_metadata)
+
+    def stream(metadata):
+        # Download, hash and transcode in one pass; the output doubles as the working file
+        video_url = metadata['source_url']
+        scraper = context.scraper_for(video_url)
+        platform = scraper.platform_name
+        video_id = scraper.get_video_id(video_url)
+        metadata.pop('info', None)
+
         try:
-            # Extract metadata and download
-            video_metadata = youtube_scraper.process_video(video_url)
+            info = scraper.resolve_stream(video_url)
+            result = context.stream_processors[platform].process(info, f"{platform}_{video_id}")
+        except Exception as e:
+            logger.info(f"Cannot stream video ({e}), downloading it instead: {video_url}")
+            video_metadata = download(metadata)
             if not video_metadata:
-                logger.info("Video not brand-related or failed to process")
-                continue
-            
-            # Check for duplicates
-            is_duplicate, original_path = deduplicator.is_duplicate(video_metadata['file_path'])
-            if is_duplicate:
-                logger.info(f"Duplicate detected, skipping: {video_metadata['file_path']}")
-                metadata_logger.log_metadata(video_metadata, None, "duplicate")
-                os.remove(video_metadata['file_path'])  # Remove duplicate file
+                return None
+            return transcode_video(scheduler, hash_video(video_metadata, context.deduplicator))
+
+        metadata.update(result)
+        metadata['file_path'] = result['processed_path']
+        metadata['platform'] = platform
+        return accept_download(video_url, video_id, metadata)
+
+    def deduplicate(video_metadata):
+        is_duplicate, original_url = deduplicator.is_duplicate(
+            video_metadata['file_path'], video_metadata.get('perceptual_hash'), key=video_metadata['source_url'],
+            audio_fingerprint=video_metadata.pop('audio_fingerprint', None)
+        )
+        if is_duplicate:
+            logger.info(f"Duplicate of {original_url} detected, skipping: {video_metadata['file_path']}")
+            metadata_logger.log_metadata(video_metadata, None, "duplicate")
+            video_index.mark(video_metadata['platform'], video_metadata['video_id'], "duplicate")
+            os.remove(video_metadata['file_path'])  # Remove duplicate file
+            remove_file(video_metadata.get('processed_path'))  # Already transcoded in streaming mode
+            return None
+        return video_metadata
+
+    def upload(video_metadata):
+        processed_path = video_metadata['processed_path']
+        video_metadata['uploaded_bytes'] = os.path.getsize(processed_path)
+        drive_file_id = drive_uploader.upload_file(processed_path, video_metadata['platform'])
+
+        if not drive_file_id:
+            # Raised so the video is reported as failed (and retried in bulk mode)
+            raise RuntimeError(f"Failed to upload to Drive: {processed_path}")
+
+        logger.info(f"Successfully uploaded to Drive with ID: {drive_file_id}")
+        # Log metadata
+        metadata_logger.log_metadata(video_metadata, drive_file_id, "original")
+        video_index.mark(video_metadata['platform'], video_metadata['video_id'], "uploaded")
+
+        # Clean up processed and original files
+        os.remove(processed_path)
+        remove_file(video_metadata['file_path'])
+        return video_metadata
+
+    def report(result):
+        # Results arrive in search order, whatever order the stages finished in
+        video_url = video_urls[result.index]
+        if result.status == "failed":
+            logger.error(f"Error processing video {video_url} at stage '{result.stage}': {result.error}")
+            platform = platform_for_url(video_url)
+            if platform in context.scrapers:
+                video_id = context.scrapers[platform].get_video_id(video_url)
+                video_index.mark(platform, video_id, "failed", source_url=video_url)
+            if isinstance(result.item, dict):
+                remove_file(result.item.get('file_path'))
+        elif result.status == "completed":
+            logger.info(
+                f"Finished video {result.index + 1}{f'/{total}' if total else ''} "
+                f"(transcode: {result.item['transcode_action']} in {result.item['transcode_seconds']:.1f}s): {video_url}"
+            )
+        if on_result is not None:
+            on_result(result)
+
+    # Downloads and uploads are network-bound and run in threads, hashing is
+    # CPU-bound and runs in worker processes. Transcoding runs as parallel ffmpeg
+    # processes; twice as many stage threads as ffmpeg slots keep a backlog for
+    # the scheduler to pick the shortest job from.
+    extract_stage = Stage("extract", extract, PIPELINE_WORKERS["download"])
+    upload_stage = Stage(
+        "upload", upload, PIPELINE_WORKERS["upload"], size=lambda item: item.get('uploaded_bytes')
+    )
+    if streaming:
+        # Streamed videos arrive hashed and transcoded, straight from the download
+        stages = [
+            extract_stage,
+            Stage("stream", stream, PIPELINE_WORKERS["download"], size=file_size('processed_path')),
+            Stage("dedup", deduplicate, PIPELINE_WORKERS["dedup"]),
+            upload_stage,
+        ]
+    else:
+        stages = [
+            extract_stage,
+            Stage("download", download, PIPELINE_WORKERS["download"], size=file_size('file_path')),
+            Stage("hash", hash_video, PIPELINE_WORKERS["hash"], kind="process", initializer=init_hash_worker),
+            Stage("dedup", deduplicate, PIPELINE_WORKERS["dedup"]),
+            Stage(
+                "transcode", partial(transcode_video, scheduler), scheduler.max_jobs * 2,
+                size=file_size('processed_path')
+            ),
+            upload_stage,
+        ]
+
+    # Per-stage timings go to a trace per video and to aggregates exported while running
+    metrics = MetricsRegistry(trace_file=TRACE_FILE)
+    exporter = MetricsExporter(metrics).start()
+    pipeline = PipelineRunner(stages, queue_size=PIPELINE_QUEUE_SIZE, metrics=metrics, trace_key=trace_key)
+
+    try:
+        return pipeline.run(entries(), on_result=report, on_stage=on_stage, keep_results=keep_results)
+    finally:
+        exporter.stop()
+
+
+def sweep(logger):
+    """Search every configured platform for new brand videos and run them through the full pipeline"""
+    scrapers = create_scrapers(PLATFORMS)
+    if not scrapers:
+        logger.error("No platform scraper could be set up")
+        return
+
+    context = PipelineContext(scrapers)
+    video_index = context.video_index
+
+    # Search each platform only for videos published since its last run
+    published_after = {platform: video_index.get_high_water_mark(platform, BRAND_NAME) for platform in scrapers}
+    max_results = {
+        platform: YOUTUBE_SEARCH_BUDGET if platform == "youtube" else PLATFORM_SEARCH_BUDGET
+        for platform in scrapers
+    }
+    logger.info(f"Searching {', '.join(scrapers)} for videos related to {BRAND_NAME}")
+
+    def candidates():
+        # Platforms are searched concurrently; each one's videos enter the pipeline as soon as its search is done
+        for platform, found_urls in discover(scrapers, BRAND_NAME, max_results, published_after):
+            scraper = scrapers[platform]
+            # Skip videos already handled by an earlier run before any network call
+            video_urls = [
+                url for url in found_urls
+                if not video_index.is_seen(platform, scraper.get_video_id(url))
+            ]
+            logger.info(
+                f"Found {len(found_urls)} potential {platform} videos "
+                f"(published after: {published_after[platform] or 'any time'}, "
+                f"{len(scraper.search_rejected)} off-brand results dropped), {len(video_urls)} not seen before"
+            )
+            context.prefetch(video_urls)
+            yield from video_urls
+
+    try:
+        run_videos(logger, context, candidates())
+
+        # Only reached when the run finished: next run only asks each platform for videos newer
+        # than this search covered. A search that failed part way keeps the old mark, so the
+        # results it never fetched are searched for again. One that stopped at its budget still
+        # moves the mark (the results older than its last page are given up), as does the first
+        # search of a platform, or every sweep would page through the same newest results.
+        for platform, scraper in scrapers.items():
+            if not scraper.chronological_search:
                 continue
-            
-            # Normalize video format
-            output_filename = f"{video_metadata['platform']}_{os.path.basename(video_metadata['file_path']).split('.')[0]}"
-            processed_path = converter.normalize_video(video_metadata['file_path'], output_filename)
-            
-            if not processed_path:
-                logger.error(f"Failed to normalize video: {video_metadata['file_path']}")
+            if scraper.search_truncated:
+                logger.warning(
+                    f"{platform} search stopped at its budget of {max_results[platform]} results; "
+                    f"older results are skipped"
+                )
+            elif not scraper.search_complete and published_after[platform]:
+                logger.warning(f"{platform} search failed part way; keeping its high-water mark")
                 continue
-            
-            # Upload to Google Drive
-            drive_file_id = drive_uploader.upload_file(processed_path, video_metadata['platform'])
-            
-            if drive_file_id:
-                logger.info(f"Successfully uploaded to Drive with ID: {drive_file_id}")
-                # Log metadata
-                metadata_logger.log_metadata(video_metadata, drive_file_id, "original")
-                
-                # Clean up processed file
-                os.remove(processed_path)
-            else:
-                logger.error("Failed to upload to Drive")
-            
-            # Clean up original file
-            os.remove(video_metadata['file_path'])
-            
-            # Delay between processing to avoid rate limiting
-            time.sleep(2)
-            
-        except Exception as e:
-            logger.error(f"Error processing video {video_url}: {e}")
-            continue
-    
+            mark = resolved_high_water_mark(video_index, scraper)
+            if mark:
+                video_index.set_high_water_mark(platform, BRAND_NAME, mark)
+    finally:
+        context.close()
+
     logger.info("Processing completed")
 
+
+def resolved_high_water_mark(video_index, scraper):
+    """Newest publish time up to which every result of the scraper's last search reached a final status.
+
+    The mark stops short of the oldest result that failed or was never
+    processed, so the next search finds it again; None if that is the
+    oldest result. Videos that failed VIDEO_MAX_ATTEMPTS runs are given up
+    and no longer hold it back.
+    """
+    platform = scraper.platform_name
+    results = sorted(scraper.search_results)
+    # Results dropped by the search prefilter are not persisted, but they are settled for this search
+    prefiltered = set(scraper.search_rejected)
+    unresolved = [
+        published_at for published_at, url in results
+        if url not in prefiltered and not video_index.is_seen(platform, scraper.get_video_id(url))
+    ]
+    resolved = [published_at for published_at, _ in results if not unresolved or published_at < unresolved[0]]
+    return resolved[-1] if resolved else None
+
+
+def trace_key(item):
+    """Trace key of a pipeline entry: the video URL, also for checkpointed videos"""
+    return item if isinstance(item, str) else item.get('source_url')
+
+
+def checkpoint_state(video_metadata):
+    """JSON-serializable copy of a video between two stages"""
+    state = {key: value for key, value in video_metadata.items() if key not in ('info', 'audio_fingerprint')}
+    if state.get('perceptual_hash') is not None:
+        state['perceptual_hash'] = str(state['perceptual_hash'])
+    return state
+
+
+def restore_state(state):
+    """Inverse of checkpoint_state"""
+    if state.get('perceptual_hash'):
+        state['perceptual_hash'] = imagehash.hex_to_hash(state['perceptual_hash'])
+    return state
+
+
+def resume_entry(item, names):
+    """Pipeline entry for a claimed work item: its URL, or a Resume after its last checkpoint.
+
+    Items checkpointed on another host, or whose working file is gone,
+    start over.
+    """
+    stage, state = item['stage'], item['state']
+    if not state or stage not in names[:-1]:
+        return item['url']
+    next_stage = names[names.index(stage) + 1]
+    required = RESUME_REQUIRES.get(next_stage)
+    if required and not (state.get(required) and os.path.exists(state[required])):
+        return item['url']
+    return Resume(next_stage, restore_state(state))
+
+
+def reprocess(logger, platform=None, limit=None):
+    """Run cached raw downloads through hashing, dedup, transcode and upload again.
+
+    For picking up new encoding or dedup settings without downloading
+    anything: the videos restart at the hash stage from their cached file.
+    """
+    if not RAW_CACHE:
+        logger.error("Raw cache is disabled (RAW_CACHE in config.py)")
+        return
+
+    # Nothing is downloaded, so platforms whose scraper cannot be set up are reprocessed too
+    context = PipelineContext(create_scrapers(PLATFORMS))
+
+    def cached():
+        count = 0
+        for video_platform, video_id in context.raw_cache.videos(platform):
+            if limit is not None and count >= limit:
+                return
+            download_dir = os.path.join('./data/videos/raw', video_platform)
+            entry = context.raw_cache.checkout(video_platform, video_id, download_dir)
+            if not entry or not entry['metadata']:
+                continue
+            state = restore_state(entry['metadata'])
+            state.update({
+                'file_path': entry['path'],
+                'video_hash': entry['content_hash'],
+                'platform': video_platform,
+                'video_id': video_id,
+            })
+            count += 1
+            yield Resume("hash", state)
+
+    logger.info(f"Reprocessing cached {platform or 'raw'} downloads")
+    try:
+        run_videos(logger, context, cached(), keep_results=False, streaming=False)
+    finally:
+        context.close()
+    logger.info("Reprocessing completed")
+
+
+def ingest(logger, paths):
+    """Load URL lists (CSV or JSON lines) into the bulk work queue"""
+    work_queue = WorkQueue()
+    for path in paths:
+        read, added = work_queue.ingest(path)
+        logger.info(f"Ingested {path}: {read} URLs read, {added} new")
+    work_queue.close()
+
+
+def work(logger, shard=None, limit=None):
+    """Claim videos from the bulk work queue and process them until it is empty.
+
+    Any number of workers can run at once, on one host or on several hosts
+    sharing the queue database. Stage checkpoints let a retried video skip
+    the stages it already finished.
+    """
+    scrapers = create_scrapers(PLATFORMS)
+    if not scrapers:
+        logger.error("No platform scraper could be set up")
+        return
+
+    context = PipelineContext(scrapers)
+    work_queue = WorkQueue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    names = stage_names()
+    item_ids = []  # Work item ID of each pipeline entry, by index
+
+    def claimed():
+        count = 0
+        while limit is None or count < limit:
+            batch_size = WORK_BATCH_SIZE if limit is None else min(WORK_BATCH_SIZE, limit - count)
+            batch = work_queue.claim(worker_id, batch_size, platforms=list(scrapers), shard=shard)
+            if not batch:
+                return
+
+            entries = []
+            for item in batch:
+                if item['stage'] == names[-1]:
+                    # Uploaded before the worker stopped, only the completion was lost
+                    work_queue.complete(item['id'], worker_id)
+                elif context.video_index.is_seen(item['platform'], scrapers[item['platform']].get_video_id(item['url'])):
+                    work_queue.complete(item['id'], worker_id, "skipped")
+                else:
+                    entries.append((item['id'], resume_entry(item, names)))
+            context.prefetch([entry for _, entry in entries if not isinstance(entry, Resume)])
+
+            for item_id, entry in entries:
+                item_ids.append(item_id)
+                count += 1
+                yield entry
+
+    def checkpoint(index, stage, video_metadata):
+        work_queue.checkpoint(item_ids[index], worker_id, stage, checkpoint_state(video_metadata))
+
+    def finish(result):
+        item_id = item_ids[result.index]
+        if result.status == "failed":
+            work_queue.fail(item_id, worker_id, f"{result.stage}: {result.error}")
+        else:
+            work_queue.complete(item_id, worker_id, "done" if result.status == "completed" else "dropped")
+
+    logger.info(
+        f"Worker {worker_id} claiming {', '.join(scrapers)} videos" + (f" from shard {shard[0]}/{shard[1]}" if shard else "")
+    )
+    renewal = work_queue.keep_alive(worker_id)
+    try:
+        run_videos(logger, context, claimed(), on_result=finish, on_stage=checkpoint, keep_results=False)
+    finally:
+        renewal.set()
+        # Anything still leased (interrupted run) goes back with its checkpoint
+        work_queue.release(worker_id)
+        work_queue.close()
+        context.close()
+
+    logger.info(f"Worker {worker_id} finished {len(item_ids)} videos")
+
+
+def progress(logger):
+    """Log how far the bulk work queue has come"""
+    work_queue = WorkQueue()
+    state = work_queue.progress()
+    work_queue.close()
+
+    finished = sum(state['by_status'].get(status, 0) for status in WORK_FINAL_STATUSES)
+    logger.info(f"Work queue: {finished}/{state['total']} finished, {state['workers']} active workers")
+    for status, count in sorted(state['by_status'].items()):
+        logger.info(f"  {status}: {count}")
+    for stage, count in sorted(state['in_flight'].items()):
+        logger.info(f"  in flight after {stage}: {count}")
+
+
+def parse_shard(value):
+    """Parse a K/N shard argument into (K, N)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected K/N, got {value}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 0 and {count - 1}")
+    return index, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape, process and upload brand videos")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('sweep', help="search and process new videos (default)")
+    subparsers.add_parser('dedup-archive', help="find near-duplicates across all indexed videos")
+    report_parser = subparsers.add_parser('report', help="count logged videos per platform and dedup status")
+    report_parser.add_argument('--csv', metavar='PATH', help="also export the metadata log as CSV")
+    ingest_parser = subparsers.add_parser('ingest', help="load URL lists into the bulk work queue")
+    ingest_parser.add_argument('paths', nargs='*', default=['./data/input_urls.csv'],
+                               help="CSV or JSON lines files (default: ./data/input_urls.csv)")
+    work_parser = subparsers.add_parser('work', help="process videos from the bulk work queue")
+    work_parser.add_argument('--shard', metavar='K/N', type=parse_shard,
+                             help="only claim items of shard K out of N (0-based)")
+    work_parser.add_argument('--limit', type=int, help="stop after this many videos")
+    subparsers.add_parser('progress', help="show bulk work queue progress")
+    reprocess_parser = subparsers.add_parser('reprocess', help="run cached raw downloads through the pipeline again")
+    reprocess_parser.add_argument('--platform', help="only reprocess videos of this platform")
+    reprocess_parser.add_argument('--limit', type=int, help="stop after this many videos")
+    args = parser.parse_args()
+
+    # Setup logging
+    logger = setup_logger('main', './logs/main.log')
+
+    if args.command == 'dedup-archive':
+        dedup_archive(logger)
+    elif args.command == 'report':
+        report(logger, args.csv)
+    elif args.command == 'ingest':
+        ingest(logger, args.paths)
+    elif args.command == 'work':
+        work(logger, args.shard, args.limit)
+    elif args.command == 'progress':
+        progress(logger)
+    elif args.command == 'reprocess':
+        reprocess(logger, args.platform, args.limit)
+    else:
+        sweep(logger)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
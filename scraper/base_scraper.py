@@ -3,11 +3,16 @@
 from abc import ABC, abstractmethod
 import os
 from urllib.parse import urlparse
-import yt_dlp
+from config import YTDL_POOL_SIZE, STREAM_FORMAT
+from scraper.ydl_pool import YoutubeDLPool
 from utils.helpers import retry, generate_video_hash
+from utils.rate_limiter import RequestClient
 from utils.validators import filter_video_metadata
 
 class BaseScraper(ABC):
+    # Whether search_videos returns results newest first, so a complete search can set a high-water mark
+    chronological_search = False
+    
     def __init__(self, platform_name, download_dir="./data/videos/raw"):
         self.platform_name = platform_name
         self.download_dir = os.path.join(download_dir, platform_name)
@@ -20,6 +25,21 @@ class BaseScraper(ABC):
             'quiet': True,
             'no_warnings': True,
         }
+        
+        # Long-lived yt-dlp sessions shared by metadata extraction and download
+        self.ydl_pool = YoutubeDLPool(self.ydl_opts, size=YTDL_POOL_SIZE)
+        # Same sessions for streaming mode, restricted to single-file formats (instances are created on first use)
+        self.stream_pool = YoutubeDLPool({**self.ydl_opts, 'format': STREAM_FORMAT}, size=YTDL_POOL_SIZE)
+        
+        # Every request goes through the shared per-platform rate limit
+        self.requests = RequestClient()
+        
+        # Whether the last search_videos paged, newest first, down to its published_after boundary
+        # (or the end of the results), and whether it stopped at its budget before getting there
+        self.search_complete = False
+        self.search_truncated = False
+        # (publish time, video URL) of every result of the last search, including prefiltered ones
+        self.search_results = []
     
     @abstractmethod
     def search_videos(self, query, max_results=50):
@@ -28,33 +48,81 @@ class BaseScraper(ABC):
     
     @abstractmethod
     def extract_metadata(self, video_url):
-        """Extract metadata from video URL"""
+        """Extract metadata from video URL.
+        
+        Implementations may return the yt-dlp info dict under 'info' so the
+        download can reuse it instead of resolving the URL again.
+        """
         pass
     
+    def get_video_id(self, video_url):
+        """Return the platform video ID for a video URL"""
+        return urlparse(video_url).path.rstrip('/').split('/')[-1]
+    
+    def metadata_from_info(self, info, video_url):
+        """Map a yt-dlp info dict onto the metadata fields every scraper returns"""
+        return {
+            'title': info.get('title', ''),
+            'description': info.get('description', ''),
+            'source_url': video_url,
+            'creator': info.get('uploader', ''),
+            'post_date': info.get('upload_date', ''),
+            'duration': info.get('duration', 0),
+            'view_count': info.get('view_count', 0),
+            'like_count': info.get('like_count', 0),
+            'tags': info.get('tags', []),
+            'hashtags': info.get('hashtags', []),
+            'info': info,  # Reused by download_video
+        }
+    
+    def extract_info(self, video_url):
+        """Resolve a video URL with yt-dlp without downloading it"""
+        def extract():
+            with self.ydl_pool.acquire() as ydl:
+                return ydl.extract_info(video_url, download=False)
+        
+        return self.requests.call(self.platform_name, extract)
+    
+    def resolve_stream(self, video_url):
+        """Resolve a single-file format of a video to stream; the info dict carries its URL and headers"""
+        def extract():
+            with self.stream_pool.acquire() as ydl:
+                return ydl.extract_info(video_url, download=False)
+        
+        return self.requests.call(self.platform_name, extract)
+    
     @retry(max_retries=3, delay=2)
-    def download_video(self, video_url):
-        """Download video using yt-dlp"""
+    def download_video(self, video_url, info=None):
+        """Download video using yt-dlp, reusing an extracted info dict if given"""
+        def download(info):
+            with self.ydl_pool.acquire() as ydl:
+                if info is not None:
+                    # Formats are already resolved, skip the second extraction
+                    info = ydl.process_ie_result(info, download=True)
+                else:
+                    info = ydl.extract_info(video_url, download=True)
+                return info, ydl.prepare_filename(info)
+        
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=True)
-                file_path = ydl.prepare_filename(info)
-                
-                # Generate hash for deduplication
-                video_hash = generate_video_hash(file_path)
-                
-                return {
-                    'file_path': file_path,
-                    'video_hash': video_hash,
-                    'info': info
-                }
+            info, file_path = self.requests.call(self.platform_name, download, info)
+            
+            # Generate hash for deduplication
+            video_hash = generate_video_hash(file_path)
+            
+            return {
+                'file_path': file_path,
+                'video_hash': video_hash,
+                'info': info
+            }
         except Exception as e:
             print(f"Error downloading video: {e}")
             return None
     
-    def process_video(self, video_url):
+    def process_video(self, video_url, metadata=None):
         """Full processing of a video: metadata extraction, validation, download"""
-        # Extract metadata
-        metadata = self.extract_metadata(video_url)
+        # Extract metadata unless the caller already has it
+        if metadata is None:
+            metadata = self.extract_metadata(video_url)
         if not metadata:
             return None
         
@@ -62,8 +130,9 @@ class BaseScraper(ABC):
         if not filter_video_metadata(metadata):
             return None
         
-        # Download video
-        download_result = self.download_video(video_url)
+        # Download video from the info already fetched for the metadata
+        info = metadata.pop('info', None)
+        download_result = self.download_video(video_url, info)
         if not download_result:
             return None
         
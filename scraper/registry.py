@@ -0,0 +1,78 @@
+# video_scraper_project/scraper/registry.py
+
+import importlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import PLATFORMS, YOUTUBE_API_KEY
+
+# Platform -> "module:Class" of its scraper; modules are imported only for the platforms in use
+SCRAPER_CLASSES = {
+    "youtube": "scraper.youtube_scraper:YouTubeScraper",
+    "tiktok": "scraper.tiktok_scraper:TikTokScraper",
+    "instagram": "scraper.instagram_scraper:InstagramScraper",
+    "twitter": "scraper.twitter_scraper:TwitterScraper",
+    "facebook": "scraper.facebook_scraper:FacebookScraper",
+}
+
+
+def scraper_class(platform):
+    module_name, class_name = SCRAPER_CLASSES[platform].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_scraper(platform, download_dir="./data/videos/raw"):
+    """Instantiate the scraper of a platform; raises ValueError if it cannot be set up"""
+    if platform not in SCRAPER_CLASSES:
+        raise ValueError(f"No scraper for platform '{platform}'")
+    if platform == "youtube":
+        if not YOUTUBE_API_KEY:
+            raise ValueError("YouTube API key not found")
+        return scraper_class(platform)(YOUTUBE_API_KEY, download_dir)
+    return scraper_class(platform)(download_dir)
+
+
+def create_scrapers(platforms=PLATFORMS, download_dir="./data/videos/raw"):
+    """Scrapers of every platform that can be set up, keyed by platform name"""
+    scrapers = {}
+    for platform in platforms:
+        try:
+            scrapers[platform] = create_scraper(platform, download_dir)
+        except ValueError as e:
+            print(f"Skipping {platform}: {e}")
+    return scrapers
+
+
+def discover(scrapers, query, max_results, published_after=None):
+    """Search every platform at once and yield (platform, video URLs) as each search finishes.
+
+    ``max_results`` and ``published_after`` map platforms to their search
+    budget and high-water mark. A sweep takes as long as the slowest
+    platform rather than the sum of all of them, and the first platform
+    to answer feeds the pipeline while the others are still searching.
+    Videos are yielded once per (platform, video ID), however many URL
+    forms or listing pages they were found under; a failed search is
+    reported and skipped.
+    """
+    published_after = published_after or {}
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max(1, len(scrapers)), thread_name_prefix="discovery") as executor:
+        searches = {
+            executor.submit(
+                scraper.search_videos, query, max_results[platform], published_after.get(platform)
+            ): platform
+            for platform, scraper in scrapers.items()
+        }
+        for search in as_completed(searches):
+            platform = searches[search]
+            try:
+                found_urls = search.result()
+            except Exception as e:
+                print(f"Search failed on {platform}: {e}")
+                continue
+
+            video_urls = []
+            for url in found_urls:
+                key = (platform, scrapers[platform].get_video_id(url))
+                if key not in seen:
+                    seen.add(key)
+                    video_urls.append(url)
+            yield platform, video_urls
@@ -0,0 +1,15 @@
+# video_scraper_project/scraper/tiktok_scraper.py
+
+from scraper.ytdlp_scraper import YtDlpScraper
+
+
+class TikTokScraper(YtDlpScraper):
+    """TikTok videos from the configured accounts (@user pages).
+
+    Hashtag pages are not searched: yt-dlp's tiktok:tag extractor is marked
+    as not working, so TikTok discovery only covers the accounts listed in
+    PLATFORM_SOURCES["tiktok"].
+    """
+
+    def __init__(self, download_dir="./data/videos/raw", sources=None):
+        super().__init__("tiktok", download_dir, sources)
@@ -0,0 +1,25 @@
+# video_scraper_project/scraper/twitter_scraper.py
+
+import re
+from scraper.ytdlp_scraper import YtDlpScraper
+
+STATUS_ID = re.compile(r"/status(?:es)?/(\d+)")
+
+
+class TwitterScraper(YtDlpScraper):
+    """Videos of X/Twitter posts.
+
+    yt-dlp cannot list searches or timelines, so discovery covers only the
+    listing URLs configured in PLATFORM_SOURCES; post URLs from ingested
+    lists are extracted and downloaded as usual.
+    """
+
+    def __init__(self, download_dir="./data/videos/raw", sources=None):
+        super().__init__("twitter", download_dir, sources)
+
+    def get_video_id(self, video_url):
+        """Return the post ID (x.com/<user>/status/<id>/video/1 -> <id>)"""
+        match = STATUS_ID.search(video_url)
+        if match:
+            return match.group(1)
+        return super().get_video_id(video_url)
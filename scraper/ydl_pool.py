@@ -0,0 +1,58 @@
+# video_scraper_project/scraper/ydl_pool.py
+
+import queue
+import threading
+from contextlib import contextmanager
+from utils.lazy import lazy_import
+
+yt_dlp = lazy_import("yt_dlp")
+
+
+class YoutubeDLPool:
+    """Pool of long-lived YoutubeDL instances sharing one set of options.
+
+    YoutubeDL is not thread-safe, so each instance is lent to one caller at a
+    time. Reusing instances keeps their HTTP connections, cookies and player
+    caches warm from one video to the next.
+    """
+
+    def __init__(self, ydl_opts, size=4):
+        self.ydl_opts = ydl_opts
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a YoutubeDL instance for the duration of a with block"""
+        ydl = self._get()
+        try:
+            yield ydl
+        finally:
+            self._idle.put(ydl)
+
+    def _get(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return yt_dlp.YoutubeDL(self.ydl_opts)
+
+        # Pool is exhausted, wait for an instance to be returned
+        return self._idle.get()
+
+    def close(self):
+        """Close all idle instances"""
+        while True:
+            try:
+                ydl = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            ydl.close()
+            with self._lock:
+                self._created -= 1
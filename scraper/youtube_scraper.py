@@ -1,59 +1,200 @@
 # video_scraper_project/scraper/youtube_scraper.py
-import yt_dlp
 from scraper.base_scraper import BaseScraper
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import html
 import os
-from config import BRAND_NAME
+import re
+import threading
+from urllib.parse import urlparse, parse_qs
+from config import BRAND_NAME, SEARCH_PREFILTER, YOUTUBE_SEARCH_PAGE_SIZE, TIMEOUT
+from utils.lazy import lazy_import
+from utils.validators import BRAND_MATCHER
+
+discovery = lazy_import("googleapiclient.discovery")
+api_errors = lazy_import("googleapiclient.errors")
+httplib2 = lazy_import("httplib2")
+
+# Most results search().list returns per page and IDs videos().list accepts per call
+API_PAGE_LIMIT = 50
+
+ISO8601_DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+
+def parse_duration(duration):
+    """Convert an ISO 8601 duration ("PT1H2M3S") to seconds"""
+    match = ISO8601_DURATION.match(duration or '')
+    if not match:
+        return 0
+    days, hours, minutes, seconds = match.groups()
+    return int(days or 0) * 86400 + int(hours or 0) * 3600 + int(minutes or 0) * 60 + int(float(seconds or 0))
 
 class YouTubeScraper(BaseScraper):
+    chronological_search = True
+    
     def __init__(self, api_key, download_dir="./data/videos/raw"):
         super().__init__("youtube", download_dir)
         self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self._youtube = None
+        self._youtube_lock = threading.Lock()
+        # httplib2 connections are not thread-safe, so concurrent API calls get one per thread
+        self._local = threading.local()
+        # Results of the last search dropped as off-brand from their snippet alone
+        self.search_rejected = []
     
-    def search_videos(self, query, max_results=50):
-        """Search YouTube videos related to the brand"""
+    @property
+    def youtube(self):
+        """The Data API client, built on first use.
+        
+        The discovery document ships with google-api-python-client (2.x), so
+        building the client reads a local file instead of fetching it.
+        """
+        with self._youtube_lock:
+            if self._youtube is None:
+                self._youtube = discovery.build(
+                    'youtube', 'v3', developerKey=self.api_key, static_discovery=True, cache_discovery=False
+                )
+            return self._youtube
+    
+    @youtube.setter
+    def youtube(self, service):
+        # Benchmarks swap in a fake service
+        self._youtube = service
+    
+    def search_videos(self, query, max_results=50, published_after=None):
+        """Search YouTube videos related to the brand, optionally only newer ones.
+        
+        Results are paged through with pageToken, newest first, until
+        they reach published_after or run out (search_complete), or until
+        max_results videos have been returned (search_truncated). A search
+        cut short by an API error is neither.
+        """
+        params = {
+            'q': f"{query} {BRAND_NAME}",
+            'part': "snippet",
+            'type': "video",
+            'order': "date",  # Get most recent first
+        }
+        if published_after:
+            params['publishedAfter'] = published_after
+        
+        items = []
+        self.search_complete = False
+        self.search_truncated = False
+        self.search_results = []
         try:
-            search_response = self.youtube.search().list(
-                q=f"{query} {BRAND_NAME}",
-                part="snippet",
-                maxResults=max_results,
-                type="video",
-                order="date"  # Get most recent first
-            ).execute()
-            
-            video_urls = []
-            for item in search_response.get('items', []):
-                video_id = item['id']['videoId']
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
+            while len(items) < max_results:
+                params['maxResults'] = min(YOUTUBE_SEARCH_PAGE_SIZE, API_PAGE_LIMIT, max_results - len(items))
+                search_response = self.requests.call("youtube_api", self._execute, self.youtube.search().list(**params))
+                page = search_response.get('items', [])
+                # Results older than the mark (undated ones count as newer) end the search
+                newer = [
+                    item for item in page
+                    if not published_after or (item['snippet'].get('publishedAt') or published_after) >= published_after
+                ]
+                items.extend(newer)
+                
+                params['pageToken'] = search_response.get('nextPageToken')
+                if not params['pageToken'] or len(newer) < len(page):
+                    # Out of results, or down to the boundary of the last run
+                    self.search_complete = True
+                    break
+            else:
+                self.search_truncated = True
+        except api_errors.HttpError as e:
+            print(f"An HTTP error occurred: {e}")
+            if not items:
+                return []
+        
+        # Drop off-brand results using the snippet we already have, before any extraction
+        if SEARCH_PREFILTER:
+            relevant = BRAND_MATCHER.match_many([
+                html.unescape(f"{item['snippet'].get('title', '')} {item['snippet'].get('description', '')}")
+                for item in items
+            ])
+        else:
+            relevant = [True] * len(items)
+        
+        video_urls = []
+        self.search_rejected = []
+        for item, is_relevant in zip(items, relevant):
+            video_id = item['id']['videoId']
+            video_url = f"https://www.youtube.com/watch?v={video_id}"
+            if is_relevant:
                 video_urls.append(video_url)
+            else:
+                self.search_rejected.append(video_url)
             
-            return video_urls
-        except HttpError as e:
-            print(f"An HTTP error occurred: {e}")
-            return []
+            published_at = item['snippet'].get('publishedAt')
+            if published_at:
+                self.search_results.append((published_at, video_url))
+        
+        return video_urls
+    
+    def _execute(self, request):
+        """Execute an API request on this thread's own HTTP connection"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = httplib2.Http(timeout=TIMEOUT)
+        return request.execute(http=http)
+    
+    def get_video_id(self, video_url):
+        """Return the YouTube video ID from a watch URL"""
+        video_ids = parse_qs(urlparse(video_url).query).get('v')
+        if video_ids:
+            return video_ids[0]
+        return super().get_video_id(video_url)
+    
+    def fetch_metadata(self, video_urls):
+        """Fetch metadata for many videos from the Data API, without yt-dlp.
+        
+        Up to 50 videos are looked up per videos().list call. Returns a list
+        aligned with video_urls holding the same dicts as extract_metadata
+        (minus 'info', so the download resolves the URL itself), or None for
+        videos the API did not return.
+        """
+        video_ids = [self.get_video_id(url) for url in video_urls]
+        requests = [
+            self.youtube.videos().list(
+                part="snippet,contentDetails,statistics",
+                id=",".join(video_ids[start:start + API_PAGE_LIMIT])
+            )
+            for start in range(0, len(video_ids), API_PAGE_LIMIT)
+        ]
+        
+        # The batches are fetched concurrently within the API rate limit
+        items = {}
+        for response in self.requests.map("youtube_api", self._execute, requests):
+            for item in (response or {}).get('items', []):
+                items[item['id']] = item
+        
+        return [
+            self._api_metadata(items[video_id], video_url) if video_id in items else None
+            for video_id, video_url in zip(video_ids, video_urls)
+        ]
+    
+    def _api_metadata(self, item, video_url):
+        """Map a videos().list item onto the extract_metadata fields"""
+        snippet = item.get('snippet', {})
+        statistics = item.get('statistics', {})
+        title = snippet.get('title', '')
+        description = snippet.get('description', '')
+        
+        return {
+            'title': title,
+            'description': description,
+            'source_url': video_url,
+            'creator': snippet.get('channelTitle', ''),
+            'post_date': snippet.get('publishedAt', '')[:10].replace('-', ''),  # yt-dlp's YYYYMMDD
+            'duration': parse_duration(item.get('contentDetails', {}).get('duration')),
+            'view_count': int(statistics.get('viewCount', 0)),
+            'like_count': int(statistics.get('likeCount', 0)),
+            'tags': snippet.get('tags', []),
+            'hashtags': re.findall(r"#(\w+)", f"{title} {description}"),
+        }
     
     def extract_metadata(self, video_url):
         """Extract metadata from YouTube video"""
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                
-                metadata = {
-                    'title': info.get('title', ''),
-                    'description': info.get('description', ''),
-                    'source_url': video_url,
-                    'creator': info.get('uploader', ''),
-                    'post_date': info.get('upload_date', ''),
-                    'duration': info.get('duration', 0),
-                    'view_count': info.get('view_count', 0),
-                    'like_count': info.get('like_count', 0),
-                    'tags': info.get('tags', []),
-                    'hashtags': info.get('hashtags', []),
-                }
-                
-                return metadata
+            info = self.extract_info(video_url)
+            return self.metadata_from_info(info, video_url)
         except Exception as e:
             print(f"Error extracting metadata: {e}")
             return None
\ No newline at end of file
@@ -0,0 +1,126 @@
+# video_scraper_project/scraper/ytdlp_scraper.py
+
+import re
+from datetime import datetime, timezone
+from itertools import islice
+from config import BRAND_NAME, BRAND_KEYWORDS, PLATFORM_SOURCES, SEARCH_PREFILTER
+from scraper.base_scraper import BaseScraper
+from utils.lazy import lazy_import
+from utils.validators import BRAND_MATCHER
+
+yt_dlp = lazy_import("yt_dlp")
+
+
+def brand_hashtags(query):
+    """Hashtag forms of the query and the brand keywords ("Ancient Bliss" -> "AncientBliss"), without repeats"""
+    tags = {}
+    for keyword in [query, BRAND_NAME] + BRAND_KEYWORDS:
+        tag = re.sub(r"\W", "", keyword or "")
+        if tag:
+            tags.setdefault(tag.lower(), tag)
+    return list(tags.values())
+
+
+class YtDlpScraper(BaseScraper):
+    """Search and metadata through yt-dlp alone, for platforms without an API we use.
+
+    Search enumerates listing pages yt-dlp understands (hashtag pages from
+    ``search_urls``, plus the brand accounts or pages configured in
+    PLATFORM_SOURCES) without resolving the videos on them, so a page of
+    results costs one request rather than one per video. Listings are not
+    in upload order and are cut at the budget, so these platforms never get
+    a high-water mark; already handled videos are skipped by the video index.
+    """
+
+    # Listing URL templates of the platform; {tag} is replaced by each brand hashtag
+    search_urls = []
+
+    def __init__(self, platform_name, download_dir="./data/videos/raw", sources=None):
+        super().__init__(platform_name, download_dir)
+        self.sources = PLATFORM_SOURCES.get(platform_name, []) if sources is None else sources
+        # Results of the last search dropped as off-brand from their listing text alone
+        self.search_rejected = []
+
+    def listing_urls(self, query):
+        urls = [template.format(tag=tag) for template in self.search_urls for tag in brand_hashtags(query)]
+        return urls + [url for url in self.sources if url not in urls]
+
+    def list_entries(self, listing_url, max_results):
+        """Return up to max_results flat entries of a listing page"""
+        opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'playlistend': max_results,
+        }
+
+        def extract():
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                return ydl.extract_info(listing_url, download=False)
+
+        info = self.requests.call(self.platform_name, extract) or {}
+        return list(islice(info.get('entries') or [], max_results))
+
+    def search_videos(self, query, max_results=50, published_after=None):
+        """Collect brand videos from the platform's listing pages, optionally only newer ones"""
+        self.search_rejected = []
+        video_urls = []
+        seen = set()
+        listing_urls = self.listing_urls(query)
+        if not listing_urls:
+            print(f"No {self.platform_name} listing pages to search; add accounts to PLATFORM_SOURCES['{self.platform_name}']")
+        for listing_url in listing_urls:
+            if len(video_urls) >= max_results:
+                break
+            try:
+                entries = self.list_entries(listing_url, max_results - len(video_urls))
+            except Exception as e:
+                print(f"Error listing {listing_url}: {e}")
+                continue
+
+            for entry in entries:
+                video_url = entry.get('webpage_url') or entry.get('url')
+                if not video_url or not video_url.startswith(("http://", "https://")):
+                    continue
+                video_id = self.get_video_id(video_url)
+                if video_id in seen:
+                    continue
+                seen.add(video_id)
+
+                published_at = _published_at(entry)
+                if published_after and published_at and _published_before(published_at, published_after):
+                    continue
+
+                # Hashtag pages imply the tag, so only entries with listing text are prefiltered
+                text = f"{entry.get('title') or ''} {entry.get('description') or ''}".strip()
+                if SEARCH_PREFILTER and text and not BRAND_MATCHER.matches(text):
+                    self.search_rejected.append(video_url)
+                else:
+                    video_urls.append(video_url)
+
+        return video_urls[:max_results]
+
+    def extract_metadata(self, video_url):
+        """Extract metadata from a video page with yt-dlp"""
+        try:
+            return self.metadata_from_info(self.extract_info(video_url), video_url)
+        except Exception as e:
+            print(f"Error extracting metadata: {e}")
+            return None
+
+
+def _published_at(entry):
+    """Upload time of a flat entry as an RFC 3339 string, only its date (YYYY-MM-DD) if that is all it has, or None"""
+    if entry.get('timestamp'):
+        return datetime.fromtimestamp(entry['timestamp'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if entry.get('upload_date'):
+        date = entry['upload_date']
+        return f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+    return None
+
+
+def _published_before(published_at, published_after):
+    """Whether an upload is no newer than the mark; date-only uploads are compared by day, keeping the mark's own day"""
+    if len(published_at) == len("YYYY-MM-DD"):
+        return published_at < published_after[:len(published_at)]
+    return published_at <= published_after
@@ -1,28 +1,107 @@
 # video_scraper_project/uploader/drive_uploader.py
 
+import json
 import os
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from config import DRIVE_FOLDER_BASE, DRIVE_CREDENTIALS_FILE, DRIVE_TOKEN_FILE
+import threading
+from config import (
+    DRIVE_FOLDER_BASE, DRIVE_CREDENTIALS_FILE, DRIVE_TOKEN_FILE, DRIVE_RESUMABLE_UPLOADS, DRIVE_FOLDER_CACHE_FILE
+)
+from uploader.resumable_upload import ResumableUploader
+from utils.lazy import lazy_import
+
+pydrive2_auth = lazy_import("pydrive2.auth")
+pydrive2_drive = lazy_import("pydrive2.drive")
+
+
+class FolderCache:
+    """Drive folder IDs keyed by parent ID and folder name, persisted between runs.
+    
+    Entries are trusted without checking Drive; a folder that was deleted
+    since it was cached is noticed when an upload into it fails.
+    """
+    
+    def __init__(self, path=DRIVE_FOLDER_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.folders = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.folders = json.load(f)
+    
+    @staticmethod
+    def key(folder_name, parent_id=None):
+        return f"{parent_id or 'root'}/{folder_name}"
+    
+    def get(self, folder_name, parent_id=None):
+        with self.lock:
+            return self.folders.get(self.key(folder_name, parent_id))
+    
+    def set(self, folder_name, parent_id, folder_id):
+        with self.lock:
+            self.folders[self.key(folder_name, parent_id)] = folder_id
+            self._save()
+    
+    def forget(self, folder_id):
+        """Drop a folder and every folder cached beneath it"""
+        with self.lock:
+            stale = {folder_id}
+            removed = True
+            while removed:
+                removed = False
+                for key, value in list(self.folders.items()):
+                    if value in stale or key.split('/', 1)[0] in stale:
+                        stale.add(value)
+                        del self.folders[key]
+                        removed = True
+            self._save()
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.folders, f, indent=2)
+        os.replace(temp_path, self.path)
+
 
 class DriveUploader:
+    """Upload processed videos into per-platform Drive folders.
+    
+    Authentication happens on the first upload, so runs that upload
+    nothing never load the Drive client or touch the token file.
+    """
+    
     def __init__(self):
-        self.gauth = GoogleAuth()
+        self.gauth = None
         self.drive = None
-        self.folder_ids = {}  # Cache for folder IDs
+        self.folder_ids = FolderCache()  # Folder IDs survive restarts, so startup lists nothing
+        self.auth_lock = threading.Lock()
+        self.token_lock = threading.Lock()
+        self.folder_lock = threading.Lock()  # Concurrent uploads must not create the same folder twice
         
-        # Set settings for OAuth
-        self.gauth.settings['client_config_file'] = DRIVE_CREDENTIALS_FILE
-        self.authenticate()
+        # Chunked uploads that survive dropped connections and restarts
+        self.resumable = ResumableUploader(self.get_access_token) if DRIVE_RESUMABLE_UPLOADS else None
+    
+    def ensure_authenticated(self):
+        """Authenticate unless an earlier call already did"""
+        with self.auth_lock:
+            if self.drive is None:
+                self.authenticate()
     
     def authenticate(self):
         """Authenticate with Google Drive"""
+        self.gauth = pydrive2_auth.GoogleAuth()
+        # Set settings for OAuth
+        self.gauth.settings['client_config_file'] = DRIVE_CREDENTIALS_FILE
+        # Ask for offline access on the first consent so later runs can refresh silently
+        self.gauth.settings['get_refresh_token'] = True
         try:
             # Try to load saved credentials
             self.gauth.LoadCredentialsFile(DRIVE_TOKEN_FILE)
             
-            if self.gauth.credentials is None:
-                # Authenticate if no credentials available
+            if self.gauth.credentials is None or (
+                self.gauth.access_token_expired and not self.gauth.credentials.refresh_token
+            ):
+                # Browser consent only when there is nothing to refresh from
                 self.gauth.LocalWebserverAuth()
             elif self.gauth.access_token_expired:
                 # Refresh if expired
@@ -34,21 +113,28 @@ class DriveUploader:
             # Save credentials
             self.gauth.SaveCredentialsFile(DRIVE_TOKEN_FILE)
             
-            # Use offline mode to get a refresh token
-            self.gauth.LocalWebserverAuth(access_type='offline', prompt='consent')
-            
             # Create drive instance
-            self.drive = GoogleDrive(self.gauth)
+            self.drive = pydrive2_drive.GoogleDrive(self.gauth)
             
         except Exception as e:
             print(f"Authentication failed: {e}")
             raise
     
+    def get_access_token(self):
+        """Return a valid OAuth access token, refreshing it if it has expired"""
+        self.ensure_authenticated()
+        with self.token_lock:
+            if self.gauth.access_token_expired:
+                self.gauth.Refresh()
+                self.gauth.SaveCredentialsFile(DRIVE_TOKEN_FILE)
+            return self.gauth.credentials.access_token
+    
     def get_or_create_folder(self, folder_name, parent_id=None):
         """Get or create a folder in Google Drive"""
         # Check if we already have the folder ID cached
-        if folder_name in self.folder_ids:
-            return self.folder_ids[folder_name]
+        folder_id = self.folder_ids.get(folder_name, parent_id)
+        if folder_id:
+            return folder_id
         
         # Query for existing folder
         query = f"title = '{folder_name}' and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
@@ -73,32 +159,57 @@ class DriveUploader:
             folder_id = folder['id']
         
         # Cache the folder ID
-        self.folder_ids[folder_name] = folder_id
+        self.folder_ids.set(folder_name, parent_id, folder_id)
         return folder_id
     
     def upload_file(self, file_path, platform_name):
         """Upload a file to Google Drive in the appropriate folder structure"""
         try:
-            # Get or create base folder
-            base_folder_id = self.get_or_create_folder(DRIVE_FOLDER_BASE)
-            
-            # Get or create platform folder
-            platform_folder_id = self.get_or_create_folder(platform_name, base_folder_id)
-            
-            # Create file metadata
-            file_name = os.path.basename(file_path)
-            file_metadata = {
-                'title': file_name,
-                'parents': [{'id': platform_folder_id}]
-            }
-            
-            # Create and upload file
-            file_drive = self.drive.CreateFile(file_metadata)
-            file_drive.SetContentFile(file_path)
-            file_drive.Upload()
-            
-            return file_drive['id']
+            self.ensure_authenticated()
+            for attempt in range(2):
+                with self.folder_lock:
+                    # Get or create base folder
+                    base_folder_id = self.get_or_create_folder(DRIVE_FOLDER_BASE)
+                    
+                    # Get or create platform folder
+                    platform_folder_id = self.get_or_create_folder(platform_name, base_folder_id)
+                
+                try:
+                    return self._upload_to_folder(file_path, platform_folder_id)
+                except Exception as e:
+                    if attempt > 0 or not _is_not_found(e):
+                        raise
+                    # A cached folder was deleted in Drive: forget it and look it up again
+                    print(f"Drive folder {platform_folder_id} no longer exists, refreshing folder cache")
+                    self.folder_ids.forget(base_folder_id)
             
         except Exception as e:
             print(f"Error uploading file: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def _upload_to_folder(self, file_path, folder_id):
+        # Create file metadata
+        file_name = os.path.basename(file_path)
+        if self.resumable is not None:
+            return self.resumable.upload(file_path, file_name, folder_id)
+        
+        file_metadata = {
+            'title': file_name,
+            'parents': [{'id': folder_id}]
+        }
+        
+        # Create and upload file
+        file_drive = self.drive.CreateFile(file_metadata)
+        file_drive.SetContentFile(file_path)
+        file_drive.Upload()
+        
+        return file_drive['id']
+
+
+def _is_not_found(error):
+    """Check if an upload failed with HTTP 404, e.g. because its parent folder is gone"""
+    response = getattr(error, 'response', None)  # requests.HTTPError
+    if getattr(response, 'status_code', None) == 404:
+        return True
+    details = getattr(error, 'error', None)  # pydrive2 ApiRequestError
+    return isinstance(details, dict) and details.get('code') == 404
@@ -2,24 +2,74 @@
 
 import csv
 import os
+import sqlite3
+import threading
+import time
 from datetime import datetime
+from config import METADATA_DB, METADATA_LEGACY_CSV, METADATA_FLUSH_ROWS, METADATA_FLUSH_SECONDS
+
+# Column order of the CSV export (the "video_id" column holds the Drive file ID)
+CSV_HEADER = ['video_id', 'platform', 'source_url', 'filename', 'upload_date', 'hashtags', 'dedup_status']
 
 class MetadataLogger:
-    def __init__(self, log_file="./data/metadata_log.csv"):
-        self.log_file = log_file
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    """Buffered metadata sink backed by SQLite.
+    
+    Rows are kept in memory and written in one transaction once
+    METADATA_FLUSH_ROWS have piled up or METADATA_FLUSH_SECONDS have passed.
+    The database runs in WAL mode, so several worker processes can log to
+    it at once while reports query it through the indexes.
+    """
+    
+    def __init__(self, db_path=METADATA_DB, flush_rows=METADATA_FLUSH_ROWS, flush_seconds=METADATA_FLUSH_SECONDS,
+                 legacy_csv=METADATA_LEGACY_CSV):
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
         
-        # Initialize CSV file with headers if it doesn't exist
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'video_id', 'platform', 'source_url', 'filename', 
-                    'upload_date', 'hashtags', 'dedup_status'
-                ])
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        
+        # Creating the table and carrying over the history of the old CSV log happen in one write
+        # transaction, so of several processes starting at once exactly one imports it
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            is_new = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metadata'"
+            ).fetchone() is None
+            for statement in (
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    drive_file_id TEXT,
+                    video_id TEXT,
+                    platform TEXT,
+                    source_url TEXT,
+                    filename TEXT,
+                    upload_date TEXT,
+                    hashtags TEXT,
+                    dedup_status TEXT
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_metadata_platform ON metadata (platform, dedup_status)",
+                "CREATE INDEX IF NOT EXISTS idx_metadata_source_url ON metadata (source_url)",
+                "CREATE INDEX IF NOT EXISTS idx_metadata_dedup_status ON metadata (dedup_status)",
+            ):
+                self.conn.execute(statement)
+            
+            if is_new and legacy_csv and os.path.exists(legacy_csv):
+                self._insert_imported(_read_csv_rows(legacy_csv))
+        
+        # Flush on a timer as well, so a slow trickle of rows still reaches disk
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="metadata-flush", daemon=True)
+        self._flusher.start()
     
     def log_metadata(self, video_metadata, drive_file_id, dedup_status="original"):
-        """Log video metadata to CSV file"""
+        """Queue a row of video metadata; it is written with the next batch"""
         # Prepare hashtags as string
         hashtags = video_metadata.get('hashtags', [])
         if isinstance(hashtags, list):
@@ -28,17 +78,103 @@ class MetadataLogger:
             hashtags_str = str(hashtags)
         
         # Prepare row data
-        row_data = [
+        row_data = (
             drive_file_id or 'N/A',
+            video_metadata.get('video_id'),
             video_metadata.get('platform', ''),
             video_metadata.get('source_url', ''),
             os.path.basename(video_metadata.get('file_path', '')),
             datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             hashtags_str,
             dedup_status
-        ]
+        )
         
-        # Append to CSV
-        with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(row_data)
\ No newline at end of file
+        with self.lock:
+            self.buffer.append(row_data)
+            full = len(self.buffer) >= self.flush_rows
+        if full:
+            self.flush()
+    
+    def flush(self):
+        """Write all buffered rows in a single transaction"""
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+            if not rows:
+                return
+            try:
+                with self.conn:
+                    self.conn.executemany("""
+                        INSERT INTO metadata (
+                            drive_file_id, video_id, platform, source_url, filename, upload_date, hashtags, dedup_status
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+            except sqlite3.Error as e:
+                # Keep the rows for the next flush rather than losing them
+                print(f"Error writing metadata: {e}")
+                self.buffer[:0] = rows
+    
+    def count_by_status(self, platform=None):
+        """Return {(platform, dedup_status): count}, optionally for one platform"""
+        self.flush()
+        query = "SELECT platform, dedup_status, COUNT(*) FROM metadata"
+        params = ()
+        if platform:
+            query += " WHERE platform = ?"
+            params = (platform,)
+        with self.lock:
+            rows = self.conn.execute(query + " GROUP BY platform, dedup_status", params).fetchall()
+        return {(row[0], row[1]): row[2] for row in rows}
+    
+    def export_csv(self, csv_path):
+        """Write every logged row to a CSV file in the original log format"""
+        self.flush()
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        with self.lock:
+            cursor = self.conn.execute("""
+                SELECT drive_file_id, platform, source_url, filename, upload_date, hashtags, dedup_status
+                FROM metadata ORDER BY id
+            """)
+            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADER)
+                writer.writerows(cursor)
+    
+    def import_csv(self, csv_path):
+        """Load rows from a CSV log written by export_csv (or the old CSV logger)"""
+        rows = _read_csv_rows(csv_path)
+        with self.lock, self.conn:
+            self._insert_imported(rows)
+    
+    def _insert_imported(self, rows):
+        self.conn.executemany("""
+            INSERT INTO metadata (
+                drive_file_id, video_id, platform, source_url, filename, upload_date, hashtags, dedup_status
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    
+    def close(self):
+        """Flush pending rows and close the database"""
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        with self.lock:
+            self.conn.close()
+    
+    def _flush_periodically(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(min(1.0, self.flush_seconds)):
+            if time.monotonic() - last_flush >= self.flush_seconds:
+                self.flush()
+                last_flush = time.monotonic()
+
+
+def _read_csv_rows(csv_path):
+    """Rows of a CSV log in the column order of the metadata table"""
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        return [
+            (
+                row.get('video_id'), None, row.get('platform'), row.get('source_url'), row.get('filename'),
+                row.get('upload_date'), row.get('hashtags'), row.get('dedup_status')
+            )
+            for row in csv.DictReader(f)
+        ]
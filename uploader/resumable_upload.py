@@ -0,0 +1,235 @@
+# video_scraper_project/uploader/resumable_upload.py
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    DRIVE_UPLOAD_BASE_URL, UPLOAD_CHUNK_SIZE, UPLOAD_CONCURRENCY, UPLOAD_SESSIONS_FILE, MAX_RETRIES, TIMEOUT
+)
+from utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+# Drive requires chunk sizes in multiples of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+
+
+class UploadSessionStore:
+    """Resumable upload session URIs, persisted so a restarted run can resume them"""
+
+    def __init__(self, path=UPLOAD_SESSIONS_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.sessions = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.sessions = json.load(f)
+
+    def get(self, key):
+        with self.lock:
+            return self.sessions.get(key)
+
+    def set(self, key, session_uri):
+        with self.lock:
+            self.sessions[key] = session_uri
+            self._save()
+
+    def delete(self, key):
+        with self.lock:
+            if self.sessions.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.sessions, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class ResumableUploader:
+    """Chunked, resumable uploads to the Drive v3 upload endpoint.
+
+    Each file is sent in UPLOAD_CHUNK_SIZE chunks over a session URI that
+    is saved in an UploadSessionStore. After a dropped connection or a
+    restart the server is asked how many bytes it already has and the upload
+    continues from there. All uploads share one pooled HTTP session, so
+    several files can be uploaded concurrently over kept-alive connections.
+
+    ``token_provider`` is a callable returning a valid OAuth access token;
+    ``base_url`` can point at a local fake Drive server for testing.
+    """
+
+    def __init__(self, token_provider, chunk_size=UPLOAD_CHUNK_SIZE, base_url=DRIVE_UPLOAD_BASE_URL,
+                 session_store=None, concurrency=UPLOAD_CONCURRENCY):
+        self.token_provider = token_provider
+        self.chunk_size = max(CHUNK_ALIGNMENT, chunk_size - chunk_size % CHUNK_ALIGNMENT)
+        self.base_url = base_url.rstrip('/')
+        self.session_store = session_store or UploadSessionStore()
+        self.concurrency = concurrency
+        self._http = None
+        self._http_lock = threading.Lock()
+
+    @property
+    def http(self):
+        """The pooled HTTP session, opened on the first upload"""
+        with self._http_lock:
+            if self._http is None:
+                self._http = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=self.concurrency, pool_maxsize=self.concurrency
+                )
+                self._http.mount('https://', adapter)
+                self._http.mount('http://', adapter)
+            return self._http
+
+    def upload(self, file_path, name, parent_id, mime_type='video/mp4'):
+        """Upload a file (resuming a saved session if any) and return its Drive file ID"""
+        size = os.path.getsize(file_path)
+        # The modification time ties a saved session to this exact file content
+        key = f"{os.path.abspath(file_path)}|{size}|{int(os.path.getmtime(file_path))}|{parent_id}"
+
+        failures = 0  # Consecutive failures without any progress
+        restarts = 0  # Sessions that expired mid-upload; starting over is never progress
+        resumed_at = -1
+        while True:
+            try:
+                # Querying and opening sessions are retried like the chunks: a dropped connection
+                # while resuming must not fail the upload
+                session_uri = self.session_store.get(key)
+                offset = 0
+                if session_uri:
+                    offset = self._query_offset(session_uri, size)
+                    if isinstance(offset, str):
+                        # The upload had already completed
+                        self.session_store.delete(key)
+                        return offset
+                    if offset is None:
+                        # Session expired, start over
+                        self.session_store.delete(key)
+                        session_uri = None
+                        offset = 0
+
+                if offset > resumed_at:
+                    failures = 0
+                resumed_at = offset
+
+                if not session_uri:
+                    session_uri = self._start_session(name, parent_id, mime_type, size)
+                    self.session_store.set(key, session_uri)
+
+                file_id = self._send_chunks(session_uri, file_path, offset, size, mime_type)
+            except _SessionExpired:
+                self.session_store.delete(key)
+                restarts += 1
+                if restarts >= MAX_RETRIES:
+                    raise RuntimeError(f"Upload session expired {restarts} times: {file_path}")
+                print(f"Upload session expired, starting over: {file_path}")
+                continue
+            except (requests.RequestException, _RetryableError) as e:
+                failures += 1
+                if failures >= MAX_RETRIES:
+                    raise
+                print(f"Upload interrupted ({e}), resuming: {file_path}")
+                time.sleep(2 ** failures)
+                continue
+
+            self.session_store.delete(key)
+            return file_id
+
+    def upload_many(self, uploads):
+        """Upload (file_path, name, parent_id) tuples concurrently; returns IDs in order (None on failure)"""
+        def upload_one(args):
+            try:
+                return self.upload(*args)
+            except Exception as e:
+                print(f"Error uploading file {args[0]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(upload_one, uploads))
+
+    def _headers(self, extra=None):
+        headers = {'Authorization': f"Bearer {self.token_provider()}"}
+        headers.update(extra or {})
+        return headers
+
+    def _start_session(self, name, parent_id, mime_type, size):
+        response = self.http.post(
+            f"{self.base_url}/upload/drive/v3/files",
+            params={'uploadType': 'resumable', 'fields': 'id'},
+            headers=self._headers({
+                'Content-Type': 'application/json; charset=UTF-8',
+                'X-Upload-Content-Type': mime_type,
+                'X-Upload-Content-Length': str(size),
+            }),
+            data=json.dumps({'name': name, 'parents': [parent_id]}),
+            timeout=TIMEOUT
+        )
+        _raise_for_status(response)
+        return response.headers['Location']
+
+    def _query_offset(self, session_uri, size):
+        """Return bytes already received, the file ID if complete, or None if the session is gone"""
+        response = self.http.put(
+            session_uri,
+            headers=self._headers({'Content-Length': '0', 'Content-Range': f"bytes */{size}"}),
+            timeout=TIMEOUT
+        )
+        if response.status_code in (200, 201):
+            return response.json()['id']
+        if response.status_code == 308:
+            return _received_bytes(response)
+        if response.status_code in (404, 410):
+            return None
+        _raise_for_status(response)
+        return None
+
+    def _send_chunks(self, session_uri, file_path, offset, size, mime_type):
+        with open(file_path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                content_range = f"bytes {offset}-{end}/{size}" if chunk else f"bytes */{size}"
+
+                response = self.http.put(
+                    session_uri,
+                    headers=self._headers({'Content-Type': mime_type, 'Content-Range': content_range}),
+                    data=chunk,
+                    timeout=TIMEOUT
+                )
+
+                if response.status_code in (200, 201):
+                    return response.json()['id']
+                if response.status_code == 308:
+                    offset = _received_bytes(response)
+                    continue
+                if response.status_code in (404, 410):
+                    raise _SessionExpired()
+                _raise_for_status(response)
+
+
+def _raise_for_status(response):
+    """Raise _RetryableError for statuses worth retrying, HTTPError for other errors"""
+    if response.status_code in (401, 429) or response.status_code >= 500:
+        raise _RetryableError(f"HTTP {response.status_code}")
+    response.raise_for_status()
+
+
+def _received_bytes(response):
+    """Parse the Range header of a 308 response ("bytes=0-N") into a byte count"""
+    received = response.headers.get('Range')
+    if not received:
+        return 0
+    return int(received.rsplit('-', 1)[1]) + 1
+
+
+class _SessionExpired(Exception):
+    pass
+
+
+class _RetryableError(Exception):
+    pass
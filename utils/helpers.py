@@ -2,8 +2,15 @@
 
 import hashlib
 import logging
+import random
 import time
 from functools import wraps
+from config import CONTENT_HASH_ALGORITHM
+
+try:
+    import xxhash
+except ImportError:  # Optional, only needed for CONTENT_HASH_ALGORITHM = "xxhash"
+    xxhash = None
 
 def setup_logger(name, log_file, level=logging.INFO):
     """Set up a logger with file and console output"""
@@ -23,7 +30,7 @@ def setup_logger(name, log_file, level=logging.INFO):
     return logger
 
 def retry(max_retries=3, delay=1, backoff=2):
-    """Retry decorator with exponential backoff"""
+    """Retry decorator with jittered exponential backoff"""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -35,19 +42,34 @@ def retry(max_retries=3, delay=1, backoff=2):
                     retries += 1
                     if retries >= max_retries:
                         raise e
-                    time.sleep(current_delay)
+                    # Jitter keeps workers that failed together from retrying in lockstep
+                    time.sleep(current_delay * random.uniform(0.5, 1.5))
                     current_delay *= backoff
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
-def generate_video_hash(file_path, chunk_size=8192):
-    """Generate MD5 hash for a video file"""
-    hash_md5 = hashlib.md5()
+def new_content_hasher(algorithm=CONTENT_HASH_ALGORITHM):
+    """Create an incremental hasher for video content ("blake2b", "md5", "sha256" or "xxhash")"""
+    if algorithm == "xxhash":
+        if xxhash is None:
+            raise ValueError("CONTENT_HASH_ALGORITHM is 'xxhash' but the xxhash package is not installed")
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+def generate_video_hash(file_path, chunk_size=1024 * 1024, algorithm=CONTENT_HASH_ALGORITHM):
+    """Generate a content hash for a video file"""
+    hasher = new_content_hasher(algorithm)
+    # Read into one reusable buffer instead of allocating a bytes object per chunk
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
     try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        with open(file_path, "rb", buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+        return hasher.hexdigest()
     except IOError:
         return None
\ No newline at end of file
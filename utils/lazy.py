@@ -0,0 +1,30 @@
+# video_scraper_project/utils/lazy.py
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return a module that is only executed when one of its attributes is first used.
+
+    Keeps heavy libraries (OpenCV, NumPy, yt-dlp, the Google clients) out
+    of the startup of commands and workers that never touch them. Modules
+    already imported are returned as they are.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name):
+    """Whether a module has actually been executed, rather than only lazily imported"""
+    module = sys.modules.get(name)
+    return module is not None and not isinstance(module, importlib.util._LazyModule)
@@ -0,0 +1,258 @@
+# video_scraper_project/utils/metrics.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from config import METRICS_PREFIX, METRICS_DIR, METRICS_EXPORT_INTERVAL
+
+# Histogram buckets in seconds, from a metadata lookup up to a long transcode
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+HELP = {
+    'stage_seconds': ("histogram", "Time a video spent being processed by a pipeline stage"),
+    'stage_wait_seconds': ("histogram", "Time a video waited in the queue in front of a pipeline stage"),
+    'stage_bytes_total': ("counter", "Bytes produced by a pipeline stage"),
+    'stage_items_total': ("counter", "Videos handled by a pipeline stage, by outcome"),
+    'videos_total': ("counter", "Videos that left the pipeline, by final status"),
+    'queue_depth': ("gauge", "Videos waiting in front of a pipeline stage"),
+}
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        """Bucket counts as Prometheus expects them: each includes the ones below"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Span:
+    """One stage of one video: how long it took, what it produced and how it ended"""
+
+    def __init__(self, stage, started_at, seconds, outcome, size=0, wait=None, error=None):
+        self.stage = stage
+        self.started_at = started_at
+        self.seconds = seconds
+        self.outcome = outcome  # ok, dropped or failed
+        self.size = size
+        self.wait = wait
+        self.error = error
+
+    def to_dict(self):
+        return {
+            'stage': self.stage,
+            'started_at': round(self.started_at, 3),
+            'seconds': round(self.seconds, 4),
+            'wait_seconds': round(self.wait, 4) if self.wait is not None else None,
+            'outcome': self.outcome,
+            'bytes': self.size,
+            'error': self.error,
+        }
+
+
+class Trace:
+    """All stage spans of one video, in the order they ran.
+
+    ``key`` identifies the video (its source URL in the pipeline),
+    ``index`` is its position in the run and ``run_id`` the run, so lines
+    appended to the trace file across runs can be told apart.
+    """
+
+    def __init__(self, key, index=None, run_id=None):
+        self.key = key
+        self.index = index
+        self.run_id = run_id
+        self.spans = []
+        self.status = None
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'key': self.key,
+            'index': self.index,
+            'status': self.status,
+            'seconds': round(sum(span.seconds + (span.wait or 0) for span in self.spans), 4),
+            'spans': [span.to_dict() for span in self.spans],
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms with Prometheus and JSON export.
+
+    Finished traces are appended to ``trace_file`` as JSON lines when one is
+    given. Each registry is one run, named by ``run_id`` (random unless given).
+    """
+
+    def __init__(self, prefix=METRICS_PREFIX, trace_file=None, run_id=None):
+        self.prefix = prefix
+        self.trace_file = trace_file
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def record_span(self, trace, span):
+        """Add a finished stage span to a trace and to the aggregates"""
+        trace.spans.append(span)
+        self.observe('stage_seconds', span.seconds, stage=span.stage)
+        if span.wait is not None:
+            self.observe('stage_wait_seconds', span.wait, stage=span.stage)
+        self.inc('stage_items_total', stage=span.stage, outcome=span.outcome)
+        if span.size:
+            self.inc('stage_bytes_total', span.size, stage=span.stage)
+
+    def finish_trace(self, trace, status):
+        trace.status = status
+        self.inc('videos_total', status=status)
+        if self.trace_file:
+            line = json.dumps(trace.to_dict())
+            with self.lock:
+                os.makedirs(os.path.dirname(self.trace_file) or ".", exist_ok=True)
+                with open(self.trace_file, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self.lock:
+            series = {}
+            for (name, labels), value in self.counters.items():
+                series.setdefault(name, []).append((name, labels, value))
+            for (name, labels), value in self.gauges.items():
+                series.setdefault(name, []).append((name, labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                rows = series.setdefault(name, [])
+                for bound, count in histogram.cumulative():
+                    rows.append((f"{name}_bucket", labels + (('le', _number(bound)),), count))
+                rows.append((f"{name}_bucket", labels + (('le', '+Inf'),), histogram.count))
+                rows.append((f"{name}_sum", labels, histogram.sum))
+                rows.append((f"{name}_count", labels, histogram.count))
+
+        lines = []
+        for name in sorted(series):
+            kind, description = HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {self.prefix}_{name} {description}")
+            lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+            for metric, labels, value in series[name]:
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{self.prefix}_{metric}{{{label_text}}} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """All metrics as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                'timestamp': time.time(),
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+                'histograms': [
+                    {
+                        'name': name,
+                        'labels': dict(labels),
+                        'count': histogram.count,
+                        'sum': histogram.sum,
+                        'buckets': [[bound, count] for bound, count in histogram.cumulative()],
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items(), key=lambda entry: entry[0])
+                ],
+            }
+
+    def write(self, path):
+        """Write a Prometheus text file (.prom) or a JSON snapshot (anything else), atomically"""
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+class MetricsExporter:
+    """Write a registry to disk every ``interval`` seconds and once more on stop"""
+
+    def __init__(self, registry, paths=None, interval=METRICS_EXPORT_INTERVAL):
+        self.registry = registry
+        self.paths = paths or [
+            os.path.join(METRICS_DIR, "pipeline.prom"),
+            os.path.join(METRICS_DIR, "pipeline.json"),
+        ]
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.export()
+
+    def export(self):
+        for path in self.paths:
+            try:
+                self.registry.write(path)
+            except OSError as e:
+                print(f"Error writing metrics to {path}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
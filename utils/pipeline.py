@@ -0,0 +1,247 @@
+# video_scraper_project/utils/pipeline.py
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.metrics import Span, Trace
+
+_STOP = object()
+
+
+class Stage:
+    """A pipeline stage: a function applied to each item by a pool of workers.
+
+    ``kind`` is ``"thread"`` for I/O-bound work (download, upload) or
+    ``"process"`` for CPU-bound work (hashing, transcoding). Process stage
+    functions and the items they receive must be picklable.
+
+    The function returns the (possibly updated) item to pass it on, or
+    ``None`` to drop it. Raising marks the item as failed at this stage.
+    ``size`` optionally maps a stage output to the bytes it produced, for
+    metrics. ``initializer`` is run once in each worker process of a
+    process stage, to set up state its function reuses for every item.
+    """
+
+    def __init__(self, name, func, workers=1, kind="thread", queue_size=None, size=None, initializer=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.kind = kind
+        self.queue_size = queue_size
+        self.size = size
+        self.initializer = initializer
+
+
+class Resume:
+    """An item that already went through the earlier stages and enters the pipeline at ``stage``"""
+
+    def __init__(self, stage, item):
+        self.stage = stage
+        self.item = item
+
+
+class PipelineResult:
+    """Outcome of one item after it left the pipeline"""
+
+    def __init__(self, index, item):
+        self.index = index
+        self.item = item
+        self.status = "completed"  # completed, dropped or failed
+        self.stage = None  # Stage where the item stopped, if it did not complete
+        self.error = None
+        self.trace = None  # Per-stage spans, when the runner records metrics
+
+
+class PipelineRunner:
+    """Run items through a chain of stages connected by bounded queues.
+
+    Every stage runs concurrently with its own worker pool, so overall
+    throughput is set by the slowest stage. Each queue holds at most
+    ``queue_size`` items, which blocks upstream stages when a downstream
+    stage falls behind and caps the number of videos held on disk.
+
+    With a ``metrics`` registry every item gets a trace with one span per
+    stage, and stage durations, queue waits, bytes and outcomes are
+    aggregated per stage. ``trace_key`` maps an item (the item of a Resume)
+    to the key of its trace; by default traces are keyed by input position.
+    """
+
+    def __init__(self, stages, queue_size=4, metrics=None, trace_key=None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.metrics = metrics
+        self.trace_key = trace_key
+
+    def run(self, items, on_result=None, on_stage=None, keep_results=True):
+        """Process all items and return their results in input order.
+
+        ``items`` may be a generator; it is consumed as the first queue has
+        room. Items wrapped in Resume skip the stages before the one named.
+        ``on_result`` is called with each PipelineResult in input order as
+        soon as every earlier item has finished. ``on_stage`` is called with
+        the item index, the stage name and the stage output each time a stage
+        succeeds, for checkpoints. Long-running callers that only need
+        ``on_result`` pass ``keep_results=False`` and get an empty list back.
+        """
+        positions = {stage.name: position for position, stage in enumerate(self.stages)}
+        queues = [queue.Queue(maxsize=stage.queue_size or self.queue_size) for stage in self.stages]
+        results = {}
+        reporter = _OrderedReporter(on_result)
+        executors = {}
+        threads = []
+
+        for stage in self.stages:
+            if stage.kind == "process":
+                executors[stage.name] = ProcessPoolExecutor(max_workers=stage.workers, initializer=stage.initializer)
+
+        def finish(result, trace):
+            if self.metrics is not None:
+                result.trace = trace
+                _call_safely("metrics", self.metrics.finish_trace, trace, result.status)
+            if keep_results:
+                results[result.index] = result
+            reporter.report(result)
+
+        def feed():
+            try:
+                for index, item in enumerate(items):
+                    position = 0
+                    if isinstance(item, Resume):
+                        position, item = positions[item.stage], item.item
+                    key = self.trace_key(item) if self.trace_key is not None else index
+                    run_id = self.metrics.run_id if self.metrics is not None else None
+                    queues[position].put((index, item, Trace(key, index, run_id), time.time()))
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_STOP)
+
+        def record(stage, trace, started_at, queued_at, outcome, output=None, error=None):
+            if self.metrics is not None:
+                _call_safely("metrics", record_span, stage, trace, started_at, queued_at, outcome, output, error)
+
+        def record_span(stage, trace, started_at, queued_at, outcome, output, error):
+            size = 0
+            if output is not None and stage.size is not None:
+                try:
+                    size = stage.size(output) or 0
+                except (OSError, KeyError, TypeError):
+                    size = 0
+            self.metrics.record_span(trace, Span(
+                stage.name,
+                started_at,
+                time.time() - started_at,
+                outcome,
+                size=size,
+                wait=started_at - queued_at,
+                error=repr(error) if error is not None else None
+            ))
+
+        def work(position, remaining):
+            try:
+                process(position)
+            finally:
+                # The last worker of a stage to stop shuts down the next stage, even if this one failed
+                with remaining["lock"]:
+                    remaining["count"] -= 1
+                    last = remaining["count"] == 0
+                if last and position + 1 < len(self.stages):
+                    for _ in range(self.stages[position + 1].workers):
+                        queues[position + 1].put(_STOP)
+
+        def process(position):
+            stage = self.stages[position]
+            executor = executors.get(stage.name)
+            while True:
+                entry = queues[position].get()
+                if entry is _STOP:
+                    break
+
+                index, item, trace, queued_at = entry
+                result = PipelineResult(index, item)
+                started_at = time.time()
+                if self.metrics is not None:
+                    self.metrics.set('queue_depth', queues[position].qsize(), stage=stage.name)
+                try:
+                    if executor is not None:
+                        output = executor.submit(stage.func, item).result()
+                    else:
+                        output = stage.func(item)
+                except Exception as e:
+                    record(stage, trace, started_at, queued_at, "failed", error=e)
+                    result.status, result.stage, result.error = "failed", stage.name, e
+                    finish(result, trace)
+                    continue
+
+                if output is None:
+                    record(stage, trace, started_at, queued_at, "dropped")
+                    result.status, result.stage = "dropped", stage.name
+                    finish(result, trace)
+                    continue
+
+                record(stage, trace, started_at, queued_at, "ok", output=output)
+                if on_stage is not None:
+                    _call_safely(f"on_stage for item {index}", on_stage, index, stage.name, output)
+                if position + 1 < len(self.stages):
+                    queues[position + 1].put((index, output, trace, time.time()))
+                else:
+                    result.item = output
+                    finish(result, trace)
+
+        try:
+            threads.append(threading.Thread(target=feed, daemon=True))
+            for position, stage in enumerate(self.stages):
+                remaining = {"count": stage.workers, "lock": threading.Lock()}
+                for n in range(stage.workers):
+                    threads.append(threading.Thread(
+                        target=work,
+                        args=(position, remaining),
+                        name=f"{stage.name}-{n}",
+                        daemon=True
+                    ))
+
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
+
+        return [results[index] for index in sorted(results)]
+
+
+class _OrderedReporter:
+    """Deliver results to a callback in input order"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.next_index = 0
+
+    def report(self, result):
+        if self.callback is None:
+            return
+        with self.lock:
+            self.pending[result.index] = result
+            while self.next_index in self.pending:
+                result = self.pending.pop(self.next_index)
+                self.next_index += 1
+                _call_safely(f"on_result for item {result.index}", self.callback, result)
+
+
+def _call_safely(description, func, *args):
+    """Call a callback, printing its error instead of raising it.
+
+    Callbacks run on the stage threads; one that raised (a database that is
+    locked, say) would kill its worker and leave run() waiting forever.
+    """
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"Error in {description}: {e}")
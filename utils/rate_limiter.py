@@ -0,0 +1,153 @@
+# video_scraper_project/utils/rate_limiter.py
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import RATE_LIMITS, REQUEST_WORKERS, MAX_RETRIES
+
+
+class TokenBucket:
+    """Token bucket that slows down when the server pushes back.
+
+    ``rate`` tokens per second are added up to ``burst``. A throttled
+    response halves the rate and pauses the bucket for the Retry-After
+    time; every success then raises the rate back by a small step until it
+    reaches the configured rate again.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        """Back off after a 429 (or similar) response"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def succeeded(self):
+        """Recover the rate step by step after successful requests"""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """One TokenBucket per platform or host, created on first use from RATE_LIMITS"""
+
+    def __init__(self, limits=RATE_LIMITS):
+        self.limits = limits
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, key):
+        with self.lock:
+            if key not in self.buckets:
+                rate, burst = self.limits.get(key, self.limits["default"])
+                self.buckets[key] = TokenBucket(rate, burst)
+            return self.buckets[key]
+
+
+# Shared by every scraper in the process, so limits hold across them
+RATE_LIMITER = RateLimiter()
+
+
+class RequestClient:
+    """Run requests concurrently on a thread pool within the rate limits.
+
+    Every call takes a token from the bucket of its key first. Calls that
+    fail because of throttling slow the bucket down and are retried after
+    the Retry-After time, other errors are raised as usual.
+    """
+
+    def __init__(self, limiter=RATE_LIMITER, workers=REQUEST_WORKERS, max_retries=MAX_RETRIES):
+        self.limiter = limiter
+        self.workers = workers
+        self.max_retries = max_retries
+
+    def call(self, key, func, *args, **kwargs):
+        """Run func(*args, **kwargs) as a request against the limit of key"""
+        bucket = self.limiter.bucket(key)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                throttled, retry_after = throttle_info(e)
+                attempt += 1
+                if not throttled or attempt > self.max_retries:
+                    raise
+                print(f"Rate limited by {key}, backing off ({e})")
+                bucket.throttled(retry_after)
+                continue
+            bucket.succeeded()
+            return result
+
+    def map(self, key, func, items):
+        """Call func on every item concurrently; returns results in order (None where a call failed)"""
+        def call_one(item):
+            try:
+                return self.call(key, func, item)
+            except Exception as e:
+                print(f"Request to {key} failed: {e}")
+                return None
+
+        items = list(items)
+        if len(items) <= 1:
+            return [call_one(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(call_one, items))
+
+
+def throttle_info(error):
+    """Return (throttled, retry_after_seconds) for an exception raised by a request.
+
+    Understands googleapiclient HttpError, requests HTTPError and the
+    "HTTP Error 429" messages of yt-dlp.
+    """
+    status = None
+    headers = {}
+    resp = getattr(error, 'resp', None)  # googleapiclient
+    if resp is not None:
+        status = getattr(resp, 'status', None)
+        headers = resp
+    response = getattr(error, 'response', None)  # requests
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+        headers = getattr(response, 'headers', {}) or {}
+    if status is None and re.search(r"HTTP Error 429\b", str(error)):
+        status = 429
+
+    throttled = status == 429 or (status == 403 and 'rateLimitExceeded' in str(error))
+    if not throttled:
+        return False, None
+
+    retry_after = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        retry_after = float(retry_after)
+    except (TypeError, ValueError):
+        retry_after = None
+    return True, retry_after
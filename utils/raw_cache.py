@@ -0,0 +1,182 @@
+# video_scraper_project/utils/raw_cache.py
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from config import RAW_CACHE_DIR, RAW_CACHE_MAX_BYTES
+
+try:
+    import fcntl
+except ImportError:  # Windows: hard links or copies only
+    fcntl = None
+
+# ioctl that clones a file's extents on Linux filesystems with reflinks (Btrfs, XFS)
+FICLONE = 0x40049409
+
+
+def link_file(source, target):
+    """Give target the content of source without copying data where possible.
+
+    Tries a hard link, then a reflink (copy-on-write clone), then falls
+    back to a plain copy, e.g. across filesystems.
+    """
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+        return "link"
+    except OSError:
+        pass
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return "reflink"
+            except OSError:
+                pass
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    return "copy"
+
+
+class RawCache:
+    """Content-addressed cache of raw downloads with a size budget.
+
+    Files are stored once per content hash under ``objects/`` and looked up
+    by platform and video ID; exact re-posts share one file. Adding and
+    checking out hard-link (or reflink) files between the cache and the
+    working directories, so neither costs a copy, and the pipeline deleting
+    its working file leaves the cached one in place. Raw files are never
+    modified in place, which makes the shared inode safe. Once the cache
+    grows past ``max_bytes`` the least recently used files are evicted.
+    """
+
+    def __init__(self, root=RAW_CACHE_DIR, max_bytes=RAW_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    content_hash TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_objects_last_used ON objects (last_used);
+                CREATE TABLE IF NOT EXISTS videos (
+                    platform TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    metadata TEXT,
+                    added_at REAL NOT NULL,
+                    PRIMARY KEY (platform, video_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_videos_content_hash ON videos (content_hash);
+            """)
+
+    def put(self, platform, video_id, file_path, content_hash, metadata=None):
+        """Cache a downloaded file under its content hash; metadata is any JSON-serializable dict"""
+        ext = os.path.splitext(file_path)[1]
+        object_path = os.path.join(self.objects_dir, content_hash[:2], f"{content_hash}{ext}")
+        now = time.time()
+        with self.lock:
+            known = self.conn.execute(
+                "SELECT path FROM objects WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if not known or not os.path.exists(known[0]):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                link_file(file_path, object_path)
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO objects (content_hash, path, size, last_used) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (content_hash) DO UPDATE SET last_used = excluded.last_used
+                """, (content_hash, known[0] if known else object_path, os.path.getsize(file_path), now))
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO videos (platform, video_id, content_hash, metadata, added_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (platform, video_id, content_hash, json.dumps(metadata) if metadata else None, now))
+            self._evict(keep=content_hash)
+
+    def get(self, platform, video_id):
+        """Return the cache entry of a video as a dict ('path', 'content_hash', 'metadata'), or None"""
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT objects.path, videos.content_hash, videos.metadata
+                FROM videos JOIN objects ON objects.content_hash = videos.content_hash
+                WHERE videos.platform = ? AND videos.video_id = ?
+            """, (platform, video_id)).fetchone()
+            if not row:
+                return None
+            path, content_hash, metadata = row
+            if not os.path.exists(path):
+                # Removed behind the cache's back
+                self._drop(content_hash)
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE objects SET last_used = ? WHERE content_hash = ?", (time.time(), content_hash)
+                )
+        return {'path': path, 'content_hash': content_hash, 'metadata': json.loads(metadata) if metadata else None}
+
+    def checkout(self, platform, video_id, target_dir):
+        """Link a cached video into a working directory as <video_id><ext>.
+
+        Returns the cache entry with 'path' set to the working file, or None
+        if the video is not cached.
+        """
+        entry = self.get(platform, video_id)
+        if entry is None:
+            return None
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, f"{video_id}{os.path.splitext(entry['path'])[1]}")
+        link_file(entry['path'], target)
+        entry['path'] = target
+        return entry
+
+    def videos(self, platform=None):
+        """Return (platform, video_id) of every cached video, most recently added first"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT platform, video_id FROM videos WHERE ? IS NULL OR platform = ? ORDER BY added_at DESC",
+                (platform, platform)
+            ).fetchall()
+
+    def size(self):
+        """Total bytes of the cached files"""
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def _evict(self, keep=None):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for content_hash, size in self.conn.execute(
+            "SELECT content_hash, size FROM objects ORDER BY last_used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            if content_hash == keep:
+                continue
+            self._drop(content_hash)
+            total -= size
+
+    def _drop(self, content_hash):
+        row = self.conn.execute("SELECT path FROM objects WHERE content_hash = ?", (content_hash,)).fetchone()
+        if row and os.path.exists(row[0]):
+            os.remove(row[0])
+        with self.conn:
+            self.conn.execute("DELETE FROM objects WHERE content_hash = ?", (content_hash,))
+            self.conn.execute("DELETE FROM videos WHERE content_hash = ?", (content_hash,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
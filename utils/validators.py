@@ -1,25 +1,102 @@
 # video_scraper_project/utils/validators.py
 
 import re
+from bisect import bisect_right
 from config import BRAND_KEYWORDS
 
+class BrandMatcher:
+    """Case-insensitive substring matcher for a list of keywords.
+
+    The keywords are compiled into one regex shaped like a trie (shared
+    prefixes are matched once), so the cost of a search hardly grows with
+    the number of keywords. A keyword that contains a shorter keyword adds
+    nothing and is dropped. Hashtag keywords are kept literal and must end
+    at a word boundary, so "#ad" matches "#ad" but not "mad" or "#adventure".
+    """
+
+    def __init__(self, keywords):
+        trie = {}
+        hashtags = set()
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword.startswith('#'):
+                if len(keyword) > 1:
+                    hashtags.add(keyword)
+                continue
+            if not keyword:
+                continue
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        alternatives = [_trie_regex(trie)] if trie else []
+        if hashtags:
+            tags = sorted(hashtags)
+            alternatives.append('(?:' + '|'.join(re.escape(tag) for tag in tags) + r')(?!\w)')
+        self.pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def matches(self, text):
+        """Check if text contains any of the keywords"""
+        if not text or self.pattern is None:
+            return False
+        return self.pattern.search(text.lower()) is not None
+
+    def match_many(self, texts):
+        """Check a batch of texts with a single scan; returns a list of booleans"""
+        texts = [(text or '').lower() for text in texts]
+        results = [False] * len(texts)
+        if self.pattern is None or not texts:
+            return results
+
+        # Keywords never contain "\0", so no match can span two texts
+        joined = '\0'.join(texts)
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+
+        position = 0
+        while True:
+            match = self.pattern.search(joined, position)
+            if match is None:
+                break
+            index = bisect_right(starts, match.start()) - 1
+            results[index] = True
+            # Skip the rest of a text once it has matched
+            if index + 1 == len(starts):
+                break
+            position = starts[index + 1]
+        return results
+
+
+def _trie_regex(node):
+    """Build a regex from a keyword trie; an end of keyword ends the branch"""
+    if '' in node:
+        return ''
+    branches = []
+    chars = []
+    for char, child in sorted(node.items()):
+        tail = _trie_regex(child)
+        if tail:
+            branches.append(re.escape(char) + tail)
+        else:
+            chars.append(re.escape(char))
+    if len(chars) == 1:
+        branches.append(chars[0])
+    elif chars:
+        branches.append('[' + ''.join(chars) + ']')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+BRAND_MATCHER = BrandMatcher(BRAND_KEYWORDS)
+
 def is_brand_related(text):
     """Check if text contains brand-related keywords"""
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    for keyword in BRAND_KEYWORDS:
-        if keyword.lower() in text_lower:
-            return True
-    
-    # Check for hashtags
-    hashtags = re.findall(r"#(\w+)", text)
-    for tag in hashtags:
-        if any(keyword.lower() in tag.lower() for keyword in BRAND_KEYWORDS):
-            return True
-    
-    return False
+    return BRAND_MATCHER.matches(text)
 
 def filter_video_metadata(metadata):
     """Filter video metadata to ensure it's brand-related"""
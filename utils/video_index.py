@@ -0,0 +1,130 @@
+# video_scraper_project/utils/video_index.py
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from config import VIDEO_INDEX_DB, VIDEO_MAX_ATTEMPTS
+
+# Statuses after which a video never needs to be fetched again
+FINAL_STATUSES = ("uploaded", "duplicate", "rejected")
+
+
+class VideoIndex:
+    """Persistent record of every video the pipeline has seen.
+
+    Videos are keyed by platform and video ID so already handled ones can be
+    skipped before any network call. The index also keeps a high-water mark
+    per search query so each run only discovers newly published videos.
+    Failed runs are counted per video; after ``max_attempts`` of them the
+    video is given up like a handled one, so a permanently unavailable
+    video does not hold back the high-water mark forever.
+    """
+
+    def __init__(self, db_path=VIDEO_INDEX_DB, max_attempts=VIDEO_MAX_ATTEMPTS):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    platform TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    content_hash TEXT,
+                    source_url TEXT,
+                    updated_at TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (platform, video_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_videos_content_hash ON videos (content_hash);
+                CREATE TABLE IF NOT EXISTS query_marks (
+                    platform TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    published_after TEXT NOT NULL,
+                    updated_at TEXT,
+                    PRIMARY KEY (platform, query)
+                );
+            """)
+            # Indexes created before failed attempts were counted
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(videos)")]
+            if 'attempts' not in columns:
+                self.conn.execute("ALTER TABLE videos ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def get_status(self, platform, video_id):
+        """Return the recorded status of a video, or None if never seen"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status FROM videos WHERE platform = ? AND video_id = ?",
+                (platform, video_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_seen(self, platform, video_id):
+        """Check if a video was already handled, or given up after failing too often, and should not be fetched again"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, attempts FROM videos WHERE platform = ? AND video_id = ?",
+                (platform, video_id)
+            ).fetchone()
+        return row is not None and (row[0] in FINAL_STATUSES or row[1] >= self.max_attempts)
+
+    def mark(self, platform, video_id, status, content_hash=None, source_url=None):
+        """Record the current status of a video; a "failed" status counts one more failed attempt"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        attempts = 1 if status == "failed" else 0
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO videos (platform, video_id, status, content_hash, source_url, updated_at, attempts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (platform, video_id) DO UPDATE SET
+                    status = excluded.status,
+                    content_hash = COALESCE(excluded.content_hash, videos.content_hash),
+                    source_url = COALESCE(excluded.source_url, videos.source_url),
+                    updated_at = excluded.updated_at,
+                    attempts = videos.attempts + excluded.attempts
+            """, (platform, video_id, status, content_hash, source_url, now, attempts))
+
+    def find_by_content_hash(self, content_hash, platform=None, video_id=None):
+        """Return (platform, video_id) of an uploaded video with identical content, or None.
+
+        The video given by platform and video_id itself is never returned.
+        """
+        if not content_hash:
+            return None
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT platform, video_id FROM videos
+                WHERE content_hash = ? AND status = 'uploaded'
+                  AND NOT (platform IS ? AND video_id IS ?)
+                LIMIT 1
+            """, (content_hash, platform, video_id)).fetchone()
+        return tuple(row) if row else None
+
+    def get_high_water_mark(self, platform, query):
+        """Return the newest publish time seen for a query (RFC 3339), or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT published_after FROM query_marks WHERE platform = ? AND query = ?",
+                (platform, query)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_high_water_mark(self, platform, query, published_at):
+        """Advance the high-water mark of a query; it never moves backwards"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO query_marks (platform, query, published_after, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (platform, query) DO UPDATE SET
+                    published_after = MAX(query_marks.published_after, excluded.published_after),
+                    updated_at = excluded.updated_at
+            """, (platform, query, published_at, now))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
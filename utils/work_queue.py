@@ -0,0 +1,311 @@
+# video_scraper_project/utils/work_queue.py
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+from config import (
+    WORK_QUEUE_DB, WORK_QUEUE_JOURNAL_MODE, WORK_LEASE_SECONDS, WORK_MAX_ATTEMPTS
+)
+
+# Host suffix -> platform, for URL lists without a platform column
+PLATFORM_HOSTS = {
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'tiktok.com': 'tiktok',
+    'instagram.com': 'instagram',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+    'facebook.com': 'facebook',
+    'fb.watch': 'facebook',
+}
+
+# Statuses of items that will not be claimed again
+FINAL_STATUSES = ("done", "dropped", "skipped", "failed")
+
+URL_COLUMNS = ("url", "video_url", "source_url")
+
+
+def platform_for_url(url):
+    """Guess the platform of a video URL from its host, or None"""
+    host = (urlparse(url).hostname or "").lower()
+    for suffix, platform in PLATFORM_HOSTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return platform
+    return None
+
+
+def read_url_file(path):
+    """Yield (url, platform) from a CSV or JSON lines file.
+
+    CSV files may have a header with a url (or video_url/source_url) column
+    and an optional platform column; without a header the first column is
+    the URL. JSON lines are objects with 'url' and optional 'platform', or
+    bare strings. The platform is guessed from the URL when missing.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in f if line.strip())
+            rows = ({'url': row} if isinstance(row, str) else row for row in rows)
+        else:
+            rows = _csv_rows(f)
+
+        for row in rows:
+            url = (row.get('url') or "").strip()
+            if not url.startswith(("http://", "https://")):
+                continue
+            yield url, (row.get('platform') or "").strip().lower() or platform_for_url(url)
+
+
+def _csv_rows(f):
+    reader = csv.reader(f)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [cell.strip().lower() for cell in first]
+    url_column = next((header.index(name) for name in URL_COLUMNS if name in header), None)
+    platform_column = header.index('platform') if 'platform' in header else None
+    if url_column is None:
+        # No header: the first row is data too
+        url_column = 0
+        yield {'url': first[0]} if first else {}
+
+    for cells in reader:
+        if len(cells) <= url_column:
+            continue
+        row = {'url': cells[url_column]}
+        if platform_column is not None and platform_column < len(cells):
+            row['platform'] = cells[platform_column]
+        yield row
+
+
+class WorkQueue:
+    """Durable queue of video URLs shared by many worker processes.
+
+    Workers claim small batches under a lease that expires unless renewed,
+    so the items of a crashed worker return to the queue on their own. After
+    each pipeline stage the worker saves a checkpoint (the stage name and
+    the item state as JSON); a later claim resumes from it instead of
+    redoing finished stages. Claims run in an immediate transaction, so
+    processes on one host, or on several hosts sharing the database file,
+    never get the same item.
+    """
+
+    def __init__(self, db_path=WORK_QUEUE_DB, lease_seconds=WORK_LEASE_SECONDS,
+                 max_attempts=WORK_MAX_ATTEMPTS, journal_mode=WORK_QUEUE_JOURNAL_MODE):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA busy_timeout=60000")
+
+        with self.lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS work_items (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    platform TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    stage TEXT,
+                    state TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    updated_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, platform);
+                CREATE INDEX IF NOT EXISTS idx_work_items_lease ON work_items (lease_owner);
+            """)
+
+    def ingest(self, path, batch_size=10000):
+        """Add the URLs of a CSV or JSON lines file; known URLs are ignored.
+
+        Returns (rows read, items added).
+        """
+        read = added = 0
+        batch = []
+        for url, platform in read_url_file(path):
+            batch.append((url, platform))
+            read += 1
+            if len(batch) >= batch_size:
+                added += self._insert(batch)
+                batch = []
+        if batch:
+            added += self._insert(batch)
+        return read, added
+
+    def _insert(self, rows):
+        now = _now()
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO work_items (url, platform, updated_at) VALUES (?, ?, ?)",
+                    [(url, platform, now) for url, platform in rows]
+                )
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def claim(self, worker_id, limit, platforms=None, shard=None):
+        """Lease up to ``limit`` items to a worker.
+
+        Pending items come first in ingestion order, together with leased
+        items whose lease expired. ``platforms`` restricts the claim to the
+        platforms the worker has scrapers for and ``shard`` is an (index,
+        count) pair that splits the queue between fixed groups of workers.
+        Returns dicts with 'id', 'url', 'platform', 'stage' and 'state'.
+        """
+        now = time.time()
+        conditions = ["(status = 'pending' OR (status = 'leased' AND lease_expires < ?))"]
+        params = [now]
+        if platforms:
+            conditions.append(f"platform IN ({', '.join('?' * len(platforms))})")
+            params.extend(platforms)
+        if shard:
+            conditions.append("id % ? = ?")
+            params.extend([shard[1], shard[0]])
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Items whose worker died on them too often are given up on
+                self.conn.execute("""
+                    UPDATE work_items SET status = 'failed', lease_owner = NULL, updated_at = ?,
+                        error = COALESCE(error, 'Lease expired too many times')
+                    WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """, (_now(), now, self.max_attempts))
+                rows = self.conn.execute(
+                    f"SELECT id, url, platform, stage, state FROM work_items "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+                self.conn.executemany("""
+                    UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                        attempts = attempts + 1, updated_at = ?
+                    WHERE id = ?
+                """, [(worker_id, now + self.lease_seconds, _now(), row[0]) for row in rows])
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return [
+            {
+                'id': item_id,
+                'url': url,
+                'platform': platform,
+                'stage': stage,
+                'state': json.loads(state) if state else None,
+            }
+            for item_id, url, platform, stage, state in rows
+        ]
+
+    def renew(self, worker_id):
+        """Extend the leases of every item a worker holds; returns how many it holds"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE work_items SET lease_expires = ? WHERE status = 'leased' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, worker_id)
+            )
+            return cursor.rowcount
+
+    def keep_alive(self, worker_id, interval=None):
+        """Renew a worker's leases from a background thread until the returned event is set"""
+        stop = threading.Event()
+        interval = interval or self.lease_seconds / 3
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.renew(worker_id)
+                except sqlite3.Error as e:
+                    print(f"Error renewing leases: {e}")
+
+        threading.Thread(target=run, name="lease-renewal", daemon=True).start()
+        return stop
+
+    def checkpoint(self, item_id, worker_id, stage, state):
+        """Record that an item finished a stage, with the state needed to resume after it"""
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "UPDATE work_items SET stage = ?, state = ?, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                    (stage, json.dumps(state), _now(), item_id, worker_id)
+                )
+        except sqlite3.Error as e:
+            print(f"Error saving checkpoint: {e}")
+
+    def complete(self, item_id, worker_id, status="done"):
+        """Finish an item for good (done, dropped or skipped)"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE work_items SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (status, _now(), item_id, worker_id)
+            )
+
+    def fail(self, item_id, worker_id, error):
+        """Return an item to the queue, or mark it failed once it used up its attempts.
+
+        The checkpoint is kept, so the next attempt resumes after the last
+        stage that succeeded.
+        """
+        with self.lock:
+            self.conn.execute("""
+                UPDATE work_items SET
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (self.max_attempts, str(error), _now(), item_id, worker_id))
+
+    def release(self, worker_id):
+        """Return every item a worker still holds to the queue without using up an attempt"""
+        with self.lock:
+            self.conn.execute("""
+                UPDATE work_items SET status = 'pending', attempts = MAX(attempts - 1, 0),
+                    lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE status = 'leased' AND lease_owner = ?
+            """, (_now(), worker_id))
+
+    def progress(self):
+        """Return a dict with item counts by status, leased items by last finished stage and active workers"""
+        now = time.time()
+        with self.lock:
+            by_status = dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM work_items GROUP BY status"
+            ).fetchall())
+            in_flight = dict(self.conn.execute(
+                "SELECT COALESCE(stage, 'claimed'), COUNT(*) FROM work_items "
+                "WHERE status = 'leased' AND lease_expires >= ? GROUP BY 1",
+                (now,)
+            ).fetchall())
+            workers = self.conn.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM work_items WHERE status = 'leased' AND lease_expires >= ?",
+                (now,)
+            ).fetchone()[0]
+        return {
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'in_flight': in_flight,
+            'workers': workers,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')